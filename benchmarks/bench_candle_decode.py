@@ -0,0 +1,68 @@
+"""
+Candle decode benchmark: api.request-style (stdlib json → dicts → per-candle parse into
+the ring buffer) against the raw-bytes path (decode_candles → CandleArrays → one block
+append), for every decoder installed. Run from the repo root:
+
+    python -m benchmarks.bench_candle_decode
+"""
+import json
+import timeit
+import numpy as np
+import pandas as pd
+
+from utils import candle_decode
+from utils.candle_decode import decode_candles
+from utils.ring_buffer import BarRingBuffer, candle_fields
+
+SIZES = (500, 5000)
+
+
+def make_payload(n: int, price: str = "MBA") -> bytes:
+    rng = np.random.default_rng(0)
+    mid = 1.1 + np.cumsum(rng.normal(0, 2e-4, n))
+    t0 = pd.Timestamp("2025-09-01T00:00:00Z")
+    comps = {"M": "mid", "B": "bid", "A": "ask"}
+    offsets = {"mid": 0.0, "bid": -5e-5, "ask": 5e-5}
+    candles = []
+    for i, p in enumerate(mid):
+        c = {"complete": i < n - 1, "volume": int(rng.integers(1, 500)),
+             "time": (t0 + pd.Timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%S.000000000Z")}
+        for letter in price:
+            q = p + offsets[comps[letter]]
+            c[comps[letter]] = {"o": f"{q:.5f}", "h": f"{q + 3e-4:.5f}", "l": f"{q - 3e-4:.5f}", "c": f"{q + 1e-4:.5f}"}
+        candles.append(c)
+    return json.dumps({"instrument": "EUR_USD", "granularity": "M1", "candles": candles}).encode()
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<34}{seconds * 1e3:9.2f} ms")
+    return seconds
+
+
+def main():
+    backends = ["json"] + [b for b in ("orjson", "msgspec") if getattr(candle_decode, b) is not None]
+    columns = [('High', 'Low', 'Close', 'Volume'), ('High', 'Low', 'Close', 'bid_c', 'ask_c')]
+    for n in SIZES:
+        number = max(1, 5000 // n)
+        for cols in columns:
+            probe = BarRingBuffer(n, candle_fields(cols))
+            body = make_payload(n, probe.price)
+            print(f"{n} candles, price={probe.price}, {len(body) / 1024:.0f} KiB")
+
+            def baseline():
+                b = BarRingBuffer(n, candle_fields(cols))
+                b.extend(json.loads(body.decode('utf-8'))['candles'])
+
+            base = bench("stdlib json + per-candle parse", baseline, number)
+            for backend in backends:
+                def fast(backend=backend):
+                    b = BarRingBuffer(n, candle_fields(cols))
+                    b.extend(decode_candles(body, b.source_fields, backend))
+
+                t = bench(f"{backend} → CandleArrays", fast, number)
+                print(f"  {'':<34}{base / t:9.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,25 @@ import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, timezone
-from oandapyV20 import API
 from oandapyV20.endpoints import instruments, orders
 import warnings
 from dotenv import load_dotenv
+from utils.api_client import GuardedAPI
 import traceback
 from strategies.vwap_rsi_scalping import strategy  # Your custom strategy function
 import threading
+import logging
+from utils.instruments import load_instrument_specs
+from utils.signals import evaluate_bar
+from utils.ring_buffer import BarRingBuffer, candle_fields
+from utils.lookback import Lookback, required_bars
+from utils.candle_decode import fetch_candles
+from utils.bar_close import next_bar_close, await_bar_close
+from utils.market_hours import MarketCalendar, wait_for_open
+from utils.watchdog import Watchdog
+from utils.order_tracker import OrderTracker, client_order_id
+from utils.log import get_logger, log_event, bar_fields, order_fields
+from utils.journal import Journal
 
 # -----------------------------
 # 0️⃣ Setup
@@ -17,15 +29,17 @@ import threading
 load_dotenv()
 account_id = os.getenv('OANDA_ACCOUNT_ID_HEDGE')
 access_key = os.getenv('OANDA_ACCESS_KEY')
-api = API(access_token=access_key)
+api = GuardedAPI(access_token=access_key)  # request timeouts + per-endpoint circuit breaker
 warnings.filterwarnings("ignore")
+log = get_logger("hedge")
+BAR_COLUMNS = ('Close', 'VWAP', 'RSI', 'atr', 'TotalSignal')
 
 
 # -----------------------------
 # 1️⃣ Helper functions
 # -----------------------------
-def get_candles(symbol: str, count: int = 20, granularity: str = 'M1'):
-    params = {"count": count, "granularity": granularity, "price": "MBA"}
+def get_candles(symbol: str, count: int = 20, granularity: str = 'M1', price: str = "MBA"):
+    params = {"count": count, "granularity": granularity, "price": price}
     r = instruments.InstrumentsCandles(instrument=symbol, params=params)
     response = api.request(r)
     return response['candles']
@@ -34,36 +48,33 @@ def get_candles(symbol: str, count: int = 20, granularity: str = 'M1'):
 def candles_to_df(candles):
     records = []
     for c in candles:
-        records.append({
+        record = {
             "time": pd.to_datetime(c["time"]),
             "complete": c["complete"],
             "volume": c["volume"],
-            "mid_o": float(c["mid"]["o"]),
-            "mid_h": float(c["mid"]["h"]),
-            "mid_l": float(c["mid"]["l"]),
-            "mid_c": float(c["mid"]["c"]),
-            "bid_o": float(c["bid"]["o"]),
-            "bid_h": float(c["bid"]["h"]),
-            "bid_l": float(c["bid"]["l"]),
-            "bid_c": float(c["bid"]["c"]),
-            "ask_o": float(c["ask"]["o"]),
-            "ask_h": float(c["ask"]["h"]),
-            "ask_l": float(c["ask"]["l"]),
-            "ask_c": float(c["ask"]["c"]),
-        })
+        }
+        # only the components that were requested ("M", "BA" or "MBA") are in the payload
+        for comp in ("mid", "bid", "ask"):
+            if comp in c:
+                for f in "ohlc":
+                    record[f"{comp}_{f}"] = float(c[comp][f])
+        records.append(record)
     return pd.DataFrame(records)
 
 
+instrument_specs = {}
+
+
 def format_price(price, instrument):
-    # JPY pairs → 3 decimals, others → 5 decimals
-    if "JPY" in instrument:
-        return str(round(price, 3))
-    else:
-        return str(round(price, 5))
+    spec = instrument_specs.get(instrument)
+    if spec is not None:
+        return spec.format_price(price)
+    # Fallback before the spec table is loaded: JPY pairs → 3 decimals, others → 5 decimals
+    return "%.3f" % price if "JPY" in instrument else "%.5f" % price
 
 
-def place_order(units: int, side: str, sl_price: float, tp_price: float, symbol: str):
-    data = {
+def order_data(units: int, side: str, sl_price: float, tp_price: float, symbol: str) -> dict:
+    return {
         "order": {
             "instrument": symbol,
             "units": str(units if side == "buy" else -units),
@@ -73,15 +84,22 @@ def place_order(units: int, side: str, sl_price: float, tp_price: float, symbol:
             "takeProfitOnFill": {"price": format_price(tp_price, symbol)}
         }
     }
+
+
+def place_order(units: int, side: str, sl_price: float, tp_price: float, symbol: str):
+    data = order_data(units, side, sl_price, tp_price, symbol)
     r = orders.OrderCreate(accountID=account_id, data=data)
     response = api.request(r)
-    print(f"[{datetime.now(timezone.utc)}] Order placed: {response}")
+    log_event(log, "order_placed", symbol=symbol, side=side, units=units,
+              sl=data["order"]["stopLossOnFill"]["price"], tp=data["order"]["takeProfitOnFill"]["price"],
+              **order_fields(response))
+    return response
 
 
 # -----------------------------
 # 2️⃣ Main trading loop
 # -----------------------------
-def run_symbol(symbol):
+def run_symbol(symbol, journal, calendar, tracker, heartbeat):
     backcandles = 15
     units = 1000
     ATR_multiplier_SL = 1.0
@@ -89,63 +107,70 @@ def run_symbol(symbol):
     MIN_SL_PIPS = 5     # minimum SL for scalping
     MAX_SL_PIPS = 20    # maximum SL to avoid oversized SL
 
+    fields = candle_fields(strategy.columns)  # mid only → fetched as "M"
+    # complete M1 bars: the whole UTC day for VWAP, which covers the RSI/ATR warm-up too
+    history = required_bars(strategy.lookbacks + (Lookback('backcandles', backcandles),), granularity='M1')
+    buffer = BarRingBuffer(capacity=history, fields=fields, instrument=symbol, granularity='M1')
     last_trade_time = None  # prevent repeated trades per candle
+    fetch = lambda count: fetch_candles(api, symbol, buffer.source_fields, count=count, price=buffer.price)
 
     while True:
         now = datetime.now(timezone.utc)
-        next_minute = (now + timedelta(minutes=1)).replace(second=0, microsecond=0)
+        if not calendar.is_open(symbol, now):
+            # weekend / holiday: sleep until the session opens, topping up the history a minute before
+            if not heartbeat((calendar.next_open(symbol, now) - now).total_seconds()):
+                return  # replaced by the watchdog
+            reopen = wait_for_open(calendar, symbol, now, warm=lambda: buffer.refresh(fetch))
+            log_event(log, "market_open", sample=symbol, symbol=symbol, reopen=reopen)
+            continue
+        next_minute = next_bar_close(now, 'M1')
+        if not heartbeat((next_minute - now).total_seconds()):
+            return  # replaced by the watchdog
         time.sleep(max(0, (next_minute - now).total_seconds()))
 
         try:
-            candles = get_candles(symbol, count=500)
-            df = candles_to_df(candles)
-            df = df[df['complete']]
-
-            if len(df) < backcandles:
+            # poll until OANDA has finalized the bar that just closed
+            bar = await_bar_close(buffer, fetch, next_minute, 'M1', deadline=5.0)
+            log_event(log, "bar_close", level=logging.INFO if bar.confirmed else logging.WARNING,
+                      sample=symbol if bar.confirmed else None, symbol=symbol, confirmed=bar.confirmed,
+                      latency_ms=round(bar.latency * 1e3, 1), attempts=bar.attempts)
+            new_bars = bar.new_bars
+            if not new_bars or len(buffer) < backcandles:
                 continue
-
-            df['Open'], df['High'], df['Low'], df['Close'], df['Volume'] = \
-                df['mid_o'], df['mid_h'], df['mid_l'], df['mid_c'], df['volume']
-            df = df.sort_values('time')
-            df.set_index('time', inplace=True)
-            
-            # Run strategy
-            df = strategy(df, backcandles, ATR_multiplier_SL)  # returns df with 'TotalSignal' & 'atr'
-
-            # Last candle
-            last = df.iloc[-1]
-            print(last)
-            signal = last['TotalSignal']
-            atr = last['atr']
-
-            # Convert ATR to price distance
-            sl_distance = ATR_multiplier_SL * atr
-            tp_distance = ATR_multiplier_TP * atr
-
-            if signal in [1, 2] and last_trade_time != last['time']:
-                if signal == 2:  # Buy
-                    sl_price = last['Close'] - sl_distance
-                    tp_price = last['Close'] + tp_distance
-                    place_order(units, 'buy', sl_price, tp_price, symbol)
-                    print(f"[{last['time']}] {symbol} BUY | SL:{sl_distance} TP:{tp_distance}")
-
-                elif signal == 1:  # Sell
-                    sl_price = last['Close'] + sl_distance
-                    tp_price = last['Close'] - tp_distance
-                    place_order(units, 'sell', sl_price, tp_price, symbol)
-                    print(f"[{last['time']}] {symbol} SELL | SL:{sl_distance} TP:{tp_distance}")
-
-                last_trade_time = last['time']
+            df = buffer.frame()
+
+            # Run strategy on the last complete candle
+            last, intent = evaluate_bar(symbol, df, strategy, backcandles, units,
+                                        ATR_multiplier_SL, ATR_multiplier_TP)
+            log_event(log, "bar", sample=symbol, symbol=symbol, time=df.index[-1],
+                      **bar_fields(last, BAR_COLUMNS))
+
+            if intent is not None and last_trade_time == intent.time:
+                intent = None
+            if not heartbeat.current:
+                return  # stalled and replaced meanwhile: the new thread owns this symbol
+            order_id = None
+            if intent is not None:
+                # fire and track: the fill (or reject) is matched from the transaction stream
+                order_id = client_order_id("vr", symbol, intent.time)
+                tracker.submit(order_data(intent.units, intent.side, intent.sl_price, intent.tp_price, symbol),
+                               order_id)
+                log_event(log, "signal", symbol=symbol, time=intent.time, side=intent.side,
+                          sl_distance=intent.sl_distance, tp_distance=intent.tp_distance, client_id=order_id)
+                last_trade_time = intent.time
+            journal.record(symbol, "vwap_rsi", df.index[-1], last, intent, order_id)
 
         except Exception as e:
-            print(f"[{datetime.now()}] Error for {symbol}: {e}")
-            traceback.print_exc()
+            log_event(log, "cycle_error", level=logging.ERROR, exc_info=True, symbol=symbol, error=str(e))
 
 
 # -----------------------------
 # 3️⃣ Run bot for multiple instruments
 # -----------------------------
 if __name__ == "__main__":
+    # Load instrument specs once (cached on disk across processes)
+    instrument_specs = load_instrument_specs(api, account_id)
+
     symbols = [
         'TRY_JPY', 'HKD_JPY', 'USD_PLN', 'GBP_AUD', 'NZD_USD', 'EUR_ZAR',
         'AUD_JPY', 'USD_NOK', 'CAD_CHF', 'GBP_SGD', 'USD_SEK', 'NZD_SGD',
@@ -161,11 +186,18 @@ if __name__ == "__main__":
         'EUR_AUD', 'EUR_SGD'
     ]
 
-    threads = []
+    # Per-bar decisions (indicators, signal, SL/TP, order id) for audit and replay
+    journal = Journal(os.path.join(os.getenv("JOURNAL_DIR", "journal"), "hedge.bin"))
+    # Symbols sleep while their market is closed (weekends, holidays)
+    calendar = MarketCalendar.from_specs(instrument_specs)
+    # Orders return at once; fills, rejects and ack latencies come back over the transaction stream
+    tracker = OrderTracker(api, account_id, workers=4)
+    tracker.start()
+
+    # Each symbol thread beats once per cycle; a thread that misses its beat by a minute
+    # (or dies) is reported and replaced
+    watchdog = Watchdog(grace=60.0)
     for sym in symbols:
-        t = threading.Thread(target=run_symbol, args=(sym,))
-        t.start()
-        threads.append(t)
-
-    for t in threads:
-        t.join()
+        watchdog.spawn(sym, run_symbol, sym, journal, calendar, tracker)
+    watchdog.start()
+    watchdog.join()
@@ -10,73 +10,150 @@ import warnings
 from dotenv import load_dotenv
 import traceback
 import threading
+import logging
 from strategies.mean_reversion_scalping import mean_reversion_scalping
-from utils.mean_utils import get_candles, candles_to_df, place_order, load_precisions, format_price, instrument_precisions, account_id
+from utils.signals import evaluate_bar, build_intent
+from utils.triggers import ZScoreTriggers
+from utils.resting_orders import RestingOrderBook, trigger_intents, entry_order
+from utils.order_tracker import OrderTracker, client_order_id
+from utils.ring_buffer import BarRingBuffer, candle_fields
+from utils.lookback import Lookback, required_bars
+from utils.candle_decode import fetch_candles
+from utils.bar_close import next_bar_close, await_bar_close
+from utils.market_hours import MarketCalendar, wait_for_open
+from utils.watchdog import Watchdog
+from utils.log import get_logger, log_event, bar_fields, order_fields
+from utils.journal import Journal
+from utils.order_batch import OrderBatcher
+from utils.correlation import CorrelationFilter
+from utils.spread import SpreadGate
+from utils.exposure import ExposureNetting, fetch_open_units
+from utils.sizing import FixedFractionalSizing, fetch_account_summary
+from utils.mean_utils import get_candles, order_data, load_precisions, format_price, instrument_specs, account_id, api
+log = get_logger("mean")
+BAR_COLUMNS = ('Close', 'Z_Score', 'RSI', 'atr', 'TotalSignal')
+
 # -----------------------------
 # 2️⃣ Main trading loop
 # -----------------------------
-def run_symbol(symbol):
+def run_symbol(symbol, batcher, journal, calendar, resting, tracker, heartbeat):
     backcandles = 15
-    units = 1000
+    units = 1000  # placeholder: FixedFractionalSizing sizes every order in the batch (and every resting entry)
     ATR_multiplier_SL = 1.0
     ATR_multiplier_TP = 1.5
+    # what the strategy reads, plus the close spread for SpreadGate → fetched as "BA", mid derived
+    fields = candle_fields(mean_reversion_scalping.columns, ('bid_c', 'ask_c'))
+    # complete M5 bars: just enough for every indicator to have converged on the last one
+    history = required_bars(mean_reversion_scalping.lookbacks + (Lookback('backcandles', backcandles),), granularity='M5')
+    buffer = BarRingBuffer(capacity=history, fields=fields, instrument=symbol, granularity='M5')
     last_trade_time = None  
+    # evaluate_bar calls strategy(df, backcandles, ATR_multiplier_SL): its lookback and Z threshold
+    triggers = ZScoreTriggers(lookback=backcandles, z_score_threshold=ATR_multiplier_SL)
+
+    fetch = lambda count: fetch_candles(api, symbol, buffer.source_fields, count=count,
+                                        granularity='M5', price=buffer.price)
 
     while True:
         now = datetime.now(timezone.utc)
-        next_minute = (now + timedelta(minutes=5)).replace(second=0, microsecond=0)
+        if not calendar.is_open(symbol, now):
+            # weekend / holiday: sleep until the session opens, topping up the history a minute before
+            if not heartbeat((calendar.next_open(symbol, now) - now).total_seconds()):
+                return  # replaced by the watchdog
+            reopen = wait_for_open(calendar, symbol, now, warm=lambda: buffer.refresh(fetch))
+            log_event(log, "market_open", sample=symbol, symbol=symbol, reopen=reopen)
+            continue
+        next_minute = next_bar_close(now, 'M5')
+        if not heartbeat((next_minute - now).total_seconds()):
+            return  # replaced by the watchdog
         time.sleep(max(0, (next_minute - now).total_seconds()))
 
+        intent = last = fast = None
+        new_bars = 0
         try:
-            candles = get_candles(symbol, count=500, granularity='M5')
-            df = candles_to_df(candles)
-            df = df[df['complete']]
-
-            if len(df) < backcandles:
-                continue
-
-            df['Open'], df['High'], df['Low'], df['Close'], df['Volume'] = \
-                df['mid_o'], df['mid_h'], df['mid_l'], df['mid_c'], df['volume']
-            df = df.sort_values('time')
-            df.set_index('time', inplace=True)
-            
-            # Run strategy
-            df = mean_reversion_scalping(df, backcandles, ATR_multiplier_SL)  # returns df with 'TotalSignal' & 'atr'
-
-            # Last candle
-            last = df.iloc[-1]
-            print(last)
-            signal = last['TotalSignal']
-            atr = last['atr']
-
-            # Convert ATR to price distance
-            sl_distance = ATR_multiplier_SL * atr
-            tp_distance = ATR_multiplier_TP * atr
-
-            if signal in [1, 2] and last_trade_time != last.name:
-                if signal == 2:  # Buy
-                    sl_price = last['Close'] - sl_distance
-                    tp_price = last['Close'] + tp_distance
-                    place_order(units, 'buy', sl_price, tp_price, symbol)
-                    print(f"[{last.name}] {symbol} BUY | SL:{sl_distance} TP:{tp_distance}")
-
-                elif signal == 1:  # Sell
-                    sl_price = last['Close'] + sl_distance
-                    tp_price = last['Close'] - tp_distance
-                    place_order(units, 'sell', sl_price, tp_price, symbol)
-                    print(f"[{last.name}] {symbol} SELL | SL:{sl_distance} TP:{tp_distance}")
+            # poll until OANDA has finalized the bar that just closed
+            bar = await_bar_close(buffer, fetch, next_minute, 'M5')
+            log_event(log, "bar_close", level=logging.INFO if bar.confirmed else logging.WARNING,
+                      sample=symbol if bar.confirmed else None, symbol=symbol, confirmed=bar.confirmed,
+                      latency_ms=round(bar.latency * 1e3, 1), attempts=bar.attempts)
+            new_bars = bar.new_bars
+            if new_bars and len(buffer) >= backcandles:
+                # Trigger prices armed at the previous close: the decision is two comparisons
+                fast = triggers.decide(buffer)
+                if resting is not None:
+                    pass  # resting entries trade the trigger levels server-side: no market order
+                elif fast is not None:
+                    intent = build_intent(symbol, fast[0], float(buffer.view('Close')[-1]), fast[1],
+                                          pd.Timestamp(buffer.last_time, tz='UTC'), units,
+                                          ATR_multiplier_SL, ATR_multiplier_TP)
+                else:
+                    # not armed (first bar, gap): run strategy on the last complete candle
+                    last, intent = evaluate_bar(symbol, buffer.frame(), mean_reversion_scalping, backcandles,
+                                                units, ATR_multiplier_SL, ATR_multiplier_TP)
+                if intent is not None and last_trade_time == intent.time:
+                    intent = None
+        except Exception as e:
+            log_event(log, "cycle_error", level=logging.ERROR, exc_info=True, symbol=symbol, error=str(e))
 
-                last_trade_time = last.name
+        try:
+            # Every symbol reports each cycle; the universe-wide filters run once per batch
+            close = spread = None
+            if len(buffer):
+                close = float(buffer.view('Close')[-1])
+                spread = float(buffer.view('ask_c')[-1] - buffer.view('bid_c')[-1])
+            intent = batcher.submit(symbol, next_minute, intent, close, spread)
+            if not heartbeat.current:
+                return  # stalled and replaced meanwhile: the new thread owns this symbol
+            order_id = None
+            if intent is not None:
+                # fire and track: the fill (or reject) is matched from the transaction stream
+                order_id = client_order_id("mr", symbol, intent.time)
+                tracker.submit(order_data(intent.units, intent.side, intent.sl_price, intent.tp_price, symbol),
+                               order_id)
+                log_event(log, "signal", symbol=symbol, time=intent.time, side=intent.side, units=intent.units,
+                          sl_distance=intent.sl_distance, tp_distance=intent.tp_distance, client_id=order_id)
+                last_trade_time = intent.time
+        except Exception as e:
+            log_event(log, "order_error", level=logging.ERROR, exc_info=True, symbol=symbol, error=str(e))
+            order_id = None
 
+        try:
+            # Full indicator pass off the order path: log and journal the bar, check the fast decision
+            # against it and arm the triggers for the next close
+            if new_bars and len(buffer) >= backcandles:
+                if last is None:
+                    last, _ = evaluate_bar(symbol, buffer.frame(), mean_reversion_scalping, backcandles, units,
+                                           ATR_multiplier_SL, ATR_multiplier_TP)
+                if fast is not None and (diff := triggers.check(last, *fast)):
+                    log_event(log, "trigger_parity", level=logging.WARNING, symbol=symbol, time=last.name, **diff)
+                if resting is not None and intent is None:
+                    # a resting entry the tracker saw fill during the bar is this bar's trade
+                    order_id, intent = next(iter(resting.filled(symbol)), (None, None))
+                log_event(log, "bar", sample=symbol, symbol=symbol, time=last.name, **bar_fields(last, BAR_COLUMNS))
+                journal.record(symbol, "mean_reversion", last.name, last, intent, order_id)
+                triggers.arm(buffer, last['atr'])
+                spec = instrument_specs.get(symbol)
+                if resting is not None and spec is not None and triggers.time == buffer.last_time:
+                    # move the resting entries to the levels for the bar now forming: sized and netted
+                    # by the batch stages like market orders, none on a side that holds a position
+                    held = resting.open_sides(symbol)
+                    candidates = [i for i in trigger_intents(triggers, symbol, units, ATR_multiplier_SL,
+                                                             ATR_multiplier_TP, pd.Timestamp(buffer.last_time, tz='UTC'))
+                                  if i.side not in held]
+                    admitted = batcher.screen(candidates, spreads={symbol: spread})
+                    market = float(buffer.view('Close')[-1])
+                    desired = [entry_order(i, spec, market) for i in admitted]
+                    counts = resting.sync(symbol, desired, next_minute + timedelta(minutes=5))
+                    log_event(log, "resting_sync", sample=symbol, symbol=symbol, long=triggers.long,
+                              short=triggers.short, held=sorted(held), screened=len(candidates) - len(admitted),
+                              **counts)
         except Exception as e:
-            print(f"[{datetime.now()}] Error for {symbol}: {e}")
-            traceback.print_exc()
+            log_event(log, "cycle_error", level=logging.ERROR, exc_info=True, symbol=symbol, error=str(e))
 
 # -----------------------------
 # 3️⃣ Run bot for multiple instruments
 # -----------------------------
 if __name__ == "__main__":
-    # Load instrument precisions once
+    # Load instrument specs once (cached on disk across processes)
     load_precisions(account_id)
 
     symbols = [
@@ -94,11 +171,42 @@ if __name__ == "__main__":
         'EUR_AUD', 'EUR_SGD'
     ]
 
-    threads = []
-    for sym in symbols:
-        t = threading.Thread(target=run_symbol, args=(sym,))
-        t.start()
-        threads.append(t)
+    # Symbols sleep while their market is closed; a batch only waits for those that traded the bar
+    calendar = MarketCalendar.from_specs(instrument_specs)
+
+    # Signals whose spread is wide against the stop (or the pair's usual spread) are dropped first,
+    # the rest are sized to risk 0.5% of NAV at their stop; correlated signals within one bar
+    # (the same USD/JPY move on many crosses) are deduped, then orders are netted per currency
+    # against open positions and resized to the limits
+    exposure = ExposureNetting(symbols, limit=50_000, positions_fn=lambda: fetch_open_units(api, account_id))
+    batcher = OrderBatcher(symbols, stages=[
+        SpreadGate(symbols, window=288, max_stop_ratio=0.3, max_median_multiple=2.0),
+        FixedFractionalSizing(symbols, instrument_specs, lambda: fetch_account_summary(api, account_id),
+                              risk_fraction=0.005, max_units=100_000),
+        CorrelationFilter(symbols, window=288, threshold=0.8),
+        exposure,
+    ], active=lambda cycle: calendar.open_symbols(symbols, cycle - timedelta(minutes=5)))
 
-    for t in threads:
-        t.join()
+    # Per-bar decisions (indicators, signal, SL/TP, order id) for audit and replay
+    journal = Journal(os.path.join(os.getenv("JOURNAL_DIR", "journal"), "mean.bin"))
+
+    # Orders return at once; fills, rejects and ack latencies come back over the transaction stream
+    tracker = OrderTracker(api, account_id, workers=4)
+    tracker.start()
+
+    # EXECUTION_MODE=resting keeps STOP/LIMIT entries (SL/TP attached) at the Z-score trigger
+    # prices instead of sending market orders at bar close; they are moved once per bar, tracked
+    # like market orders and not re-armed on a side whose position (per the last refresh) is open
+    resting = None
+    if os.getenv("EXECUTION_MODE", "market") == "resting":
+        resting = RestingOrderBook(api, account_id, workers=8, tracker=tracker,
+                                   positions=lambda: exposure.open_units)
+        log_event(log, "resting_cancelled", count=resting.cancel_all())
+
+    # Each symbol thread beats once per cycle; a thread that misses its beat by a minute
+    # (or dies) is reported and replaced
+    watchdog = Watchdog(grace=60.0)
+    for sym in symbols:
+        watchdog.spawn(sym, run_symbol, sym, batcher, journal, calendar, resting, tracker)
+    watchdog.start()
+    watchdog.join()
@@ -0,0 +1,87 @@
+import asyncio
+import os
+
+from strategies.mean_reversion_scalping import mean_reversion_scalping
+from strategies.vwap_rsi_scalping import strategy as vwap_rsi_scalping
+from oanda_forex_scalping.core.oanda_client import ACCOUNTS, OandaClient
+from oanda_forex_scalping.core.trading_bot import StrategyBook, TradingBot
+from utils.bars import GRANULARITY_SECONDS
+from utils.correlation import CorrelationFilter
+from utils.exposure import ExposureNetting, fetch_open_units
+from utils.journal import Journal
+from utils.order_batch import OrderBatcher
+from utils.order_tracker import OrderTracker
+from utils.sizing import FixedFractionalSizing, fetch_account_summary
+from utils.spread import SpreadGate
+
+# -----------------------------
+# 0️⃣ Books: one strategy per account, all fed by one fetch per symbol
+# -----------------------------
+# Run from the repository root:  PYTHONPATH=src python -m oanda_forex_scalping
+# BOT_ACCOUNTS picks which accounts trade (default "mean,hedge"); market data comes
+# from the first one. Each account's orders are sized and screened by its own batch
+# stages and sent through its own OrderTracker; every book's decisions go to one journal.
+BOOKS = {
+    "mean": StrategyBook("mean_reversion", mean_reversion_scalping, account="mean", tag="mr", granularity='M5',
+                         log_columns=('Close', 'Z_Score', 'atr', 'TotalSignal')),
+    "hedge": StrategyBook("vwap_rsi", vwap_rsi_scalping, account="hedge", tag="vr", granularity='M1',
+                          log_columns=('Close', 'VWAP', 'RSI', 'atr', 'TotalSignal')),
+    "main": StrategyBook("vwap_rsi_main", vwap_rsi_scalping, account="main", tag="vm", granularity='M1',
+                         log_columns=('Close', 'VWAP', 'RSI', 'atr', 'TotalSignal')),
+}
+
+symbols = [
+    'TRY_JPY', 'HKD_JPY', 'USD_PLN', 'GBP_AUD', 'NZD_USD', 'EUR_ZAR',
+    'AUD_JPY', 'USD_NOK', 'CAD_CHF', 'GBP_SGD', 'USD_SEK', 'NZD_SGD',
+    'ZAR_JPY', 'SGD_JPY', 'GBP_ZAR', 'USD_JPY', 'EUR_TRY', 'EUR_JPY',
+    'AUD_SGD', 'EUR_NZD', 'GBP_HKD', 'CHF_JPY', 'EUR_HKD', 'USD_THB',
+    'GBP_CHF', 'AUD_CHF', 'NZD_CHF', 'AUD_HKD', 'USD_CHF', 'CAD_HKD',
+    'USD_HKD', 'AUD_NZD', 'CHF_ZAR', 'EUR_CHF', 'USD_DKK', 'CAD_SGD',
+    'EUR_DKK', 'USD_ZAR', 'CAD_JPY', 'USD_HUF', 'EUR_CAD', 'EUR_USD',
+    'EUR_HUF', 'CHF_HKD', 'GBP_NZD', 'USD_SGD', 'EUR_SEK', 'USD_TRY',
+    'GBP_JPY', 'GBP_PLN', 'EUR_PLN', 'AUD_CAD', 'EUR_CZK', 'GBP_USD',
+    'USD_MXN', 'GBP_CAD', 'SGD_CHF', 'NZD_CAD', 'AUD_USD', 'NZD_JPY',
+    'USD_CNH', 'EUR_GBP', 'USD_CZK', 'NZD_HKD', 'EUR_NOK', 'USD_CAD',
+    'EUR_AUD', 'EUR_SGD'
+]
+
+
+# -----------------------------
+# 1️⃣ Order path: the same checks main.py puts in front of every order
+# -----------------------------
+def order_batcher(client: OandaClient, granularity: str) -> OrderBatcher:
+    """Spread gate, 0.5%-of-NAV sizing, correlation dedupe and exposure netting, over a day of bars."""
+    day = 86_400 // GRANULARITY_SECONDS[granularity]
+    return OrderBatcher(symbols, stages=[
+        SpreadGate(symbols, window=day, max_stop_ratio=0.3, max_median_multiple=2.0),
+        FixedFractionalSizing(symbols, client.instrument_specs,
+                              lambda: fetch_account_summary(client.api, client.account_id),
+                              risk_fraction=0.005, max_units=100_000),
+        CorrelationFilter(symbols, window=day, threshold=0.8),
+        ExposureNetting(symbols, limit=50_000, positions_fn=lambda: fetch_open_units(client.api, client.account_id)),
+    ])
+
+
+# -----------------------------
+# 2️⃣ Run
+# -----------------------------
+def main():
+    names = [n.strip() for n in os.getenv("BOT_ACCOUNTS", "mean,hedge").split(",") if n.strip()]
+    books = [BOOKS[name] for name in names]
+    clients = {name: OandaClient(ACCOUNTS[name]) for name in names}
+    trackers = {}
+    for name, client in clients.items():
+        client.load_precisions()
+        trackers[name] = OrderTracker(client.api, client.account_id, workers=4)
+        trackers[name].start()
+    batchers = {name: order_batcher(clients[name], min((b.granularity for b in books if b.account == name),
+                                                       key=GRANULARITY_SECONDS.get))
+                for name in names}
+    feed = clients[names[0]]
+    journal = Journal(os.path.join(os.getenv("JOURNAL_DIR", "journal"), "bot.bin"))
+    bot = TradingBot(symbols, books, feed.fetch_candles, clients, batchers, trackers, journal)
+    asyncio.run(bot.run())
+
+
+if __name__ == "__main__":
+    main()
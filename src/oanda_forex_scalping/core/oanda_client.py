@@ -0,0 +1,94 @@
+import os
+from dataclasses import dataclass
+from oandapyV20.endpoints import instruments, orders
+from dotenv import load_dotenv
+
+from utils.api_client import GuardedAPI
+from utils.candle_decode import fetch_candles
+from utils.instruments import load_instrument_specs
+from utils.log import get_logger, log_event, order_fields
+
+log = get_logger("client")
+
+
+# -----------------------------
+# 0️⃣ Account configuration
+# -----------------------------
+@dataclass(frozen=True)
+class AccountConfig:
+    """One OANDA account: which env vars hold its id and token."""
+    name: str
+    account_var: str
+    key_var: str
+    environment: str = "practice"
+
+    def resolve(self):
+        load_dotenv()
+        return os.getenv(self.account_var), os.getenv(self.key_var)
+
+
+# The accounts the separate scripts used to run on
+ACCOUNTS = {
+    "mean": AccountConfig("mean", "OANDA_ACCOUNT_ID_MEAN", "OANDA_ACCESS_KEY_NEW"),   # utils/mean_utils.py
+    "hedge": AccountConfig("hedge", "OANDA_ACCOUNT_ID_HEDGE", "OANDA_ACCESS_KEY"),   # hedge_thread.py
+    "main": AccountConfig("main", "OANDA_ACCOUNT_ID", "OANDA_ACCESS_KEY"),           # utils/utils.py
+}
+
+
+# -----------------------------
+# 1️⃣ Client
+# -----------------------------
+class OandaClient:
+    """Candles, instrument specs and order placement for one account."""
+
+    def __init__(self, config: AccountConfig):
+        self.name = config.name
+        self.account_id, access_key = config.resolve()
+        if not self.account_id or not access_key:
+            raise ValueError(f"{config.account_var} / {config.key_var} not set for account '{config.name}'")
+        self.api = GuardedAPI(access_token=access_key, environment=config.environment)
+        self.instrument_specs = {}
+
+    def load_precisions(self):
+        """Load the InstrumentSpec table once (cached on disk across processes)."""
+        if not self.instrument_specs:
+            self.instrument_specs = load_instrument_specs(self.api, self.account_id)
+
+    def format_price(self, price, instrument):
+        """Format price according to instrument precision."""
+        spec = self.instrument_specs.get(instrument)
+        if spec is None:
+            return "%.5f" % price  # default fallback
+        return spec.format_price(price)
+
+    def get_candles(self, symbol: str, count: int = 20, granularity: str = 'M1', price: str = "MBA"):
+        params = {"count": count, "granularity": granularity, "price": price}
+        r = instruments.InstrumentsCandles(instrument=symbol, params=params)
+        response = self.api.request(r)
+        return response['candles']
+
+    def fetch_candles(self, symbol: str, fields, count: int = 20, granularity: str = 'M1', price: str = "MBA"):
+        """Candles decoded straight into CandleArrays (fast decoder when installed)."""
+        return fetch_candles(self.api, symbol, fields, count=count, granularity=granularity, price=price)
+
+    def order_data(self, units: int, side: str, sl_price: float, tp_price: float, symbol: str) -> dict:
+        """MARKET OrderCreate body with SL/TP rounded to this account's precisions."""
+        return {
+            "order": {
+                "instrument": symbol,
+                "units": str(units if side == "buy" else -units),
+                "type": "MARKET",
+                "positionFill": "DEFAULT",
+                "stopLossOnFill": {"price": self.format_price(sl_price, symbol)},
+                "takeProfitOnFill": {"price": self.format_price(tp_price, symbol)}
+            }
+        }
+
+    def place_order(self, units: int, side: str, sl_price: float, tp_price: float, symbol: str):
+        """Send one order and wait for the response (manual use; TradingBot goes through an OrderTracker)."""
+        data = self.order_data(units, side, sl_price, tp_price, symbol)
+        r = orders.OrderCreate(accountID=self.account_id, data=data)
+        response = self.api.request(r)
+        log_event(log, "order_placed", account=self.name, symbol=symbol, side=side, units=units,
+                  **order_fields(response))
+        return response
@@ -0,0 +1,424 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import partial
+import pandas as pd
+
+from utils.bar_close import await_bar_close_async, next_bar_close
+from utils.bars import GRANULARITY_SECONDS, build_bars
+from utils.market_hours import MarketCalendar
+from utils.lookback import Lookback, required_bars
+from utils.log import get_logger, log_event, bar_fields
+from utils.order_tracker import FINAL_STATES, client_order_id
+from utils.ring_buffer import CANDLE_FIELDS, BarRingBuffer, candle_fields
+from utils.signals import OrderIntent, evaluate_bar, prepare_candles
+
+log = get_logger("bot")
+
+
+# -----------------------------
+# 0️⃣ Events
+# -----------------------------
+@dataclass(frozen=True)
+class BarClosed:
+    symbol: str
+    granularity: str
+    time: pd.Timestamp                                     # open time of the bar that just closed
+    bars: pd.DataFrame = field(repr=False, compare=False)  # prepared candles up to and including it
+
+
+@dataclass(frozen=True)
+class BarEvaluated:
+    book: str
+    symbol: str
+    time: pd.Timestamp
+    last: pd.Series = field(repr=False, compare=False)     # the strategy's last row: no trade on this bar
+
+
+@dataclass(frozen=True)
+class SignalGenerated:
+    book: str
+    intent: OrderIntent
+    bar: dict = field(default_factory=dict)               # compact fields of the strategy's last row
+    last: pd.Series = field(default=None, repr=False, compare=False)
+
+
+@dataclass(frozen=True)
+class OrderSubmitted:
+    book: str
+    intent: OrderIntent
+
+
+@dataclass(frozen=True)
+class OrderAccepted:
+    book: str
+    intent: OrderIntent
+    fields: dict = field(default_factory=dict)            # created, not (yet) filled
+
+
+@dataclass(frozen=True)
+class OrderFilled:
+    book: str
+    intent: OrderIntent
+    fields: dict = field(default_factory=dict)            # order / trade id, fill price, latencies
+
+
+@dataclass(frozen=True)
+class OrderFailed:
+    book: str
+    intent: OrderIntent
+    error: str
+
+
+# -----------------------------
+# 1️⃣ Event bus with back-pressure
+# -----------------------------
+class _Subscription:
+    def __init__(self, handler, where, maxsize, executor, workers):
+        self.handler = handler
+        self.where = where
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.executor = executor
+        self.workers = workers
+        self.tasks = []
+
+
+class EventBus:
+    """
+    In-process pub/sub on an asyncio loop.
+
+    Every subscription has its own bounded queue, so a slow handler back-pressures its
+    publishers (publish() waits for room) instead of growing memory. A handler may be
+    sync or async; sync handlers can be sent to an executor (e.g. a process pool, in
+    which case the handler and events must be picklable). Whatever events a handler
+    returns are published in turn. Every published event is also passed to `sink`,
+    the append-only event log.
+    """
+
+    def __init__(self, maxsize: int = 1000, sink=None):
+        self.maxsize = maxsize
+        self.sink = sink
+        self._subs = defaultdict(list)
+
+    def subscribe(self, event_type, handler, where=None, maxsize: int = None, executor=None, workers: int = 1):
+        self._subs[event_type].append(
+            _Subscription(handler, where, maxsize or self.maxsize, executor, workers))
+
+    async def publish(self, event) -> None:
+        if self.sink is not None:
+            self.sink(event)
+        for sub in self._subs[type(event)]:
+            if sub.where is None or sub.where(event):
+                await sub.queue.put(event)
+
+    async def _worker(self, sub: _Subscription) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await sub.queue.get()
+            try:
+                if sub.executor is not None:
+                    result = await loop.run_in_executor(sub.executor, sub.handler, event)
+                else:
+                    result = sub.handler(event)
+                    if asyncio.iscoroutine(result):
+                        result = await result
+                if result is None:
+                    continue
+                for out in (result if isinstance(result, (list, tuple)) else (result,)):
+                    await self.publish(out)
+            except Exception as e:
+                log_event(log, "handler_error", level=logging.ERROR, exc_info=True,
+                          event=type(event).__name__, error=str(e))
+            finally:
+                sub.queue.task_done()
+
+    async def drain(self, *event_types) -> None:
+        """Wait, type by type, until every handler of `event_types` has processed what it was sent."""
+        for event_type in event_types:
+            for sub in self._subs[event_type]:
+                await sub.queue.join()
+
+    def start(self) -> None:
+        for subs in self._subs.values():
+            for sub in subs:
+                sub.tasks = [asyncio.create_task(self._worker(sub)) for _ in range(sub.workers)]
+
+    async def stop(self) -> None:
+        for subs in self._subs.values():
+            for sub in subs:
+                for task in sub.tasks:
+                    task.cancel()
+                await asyncio.gather(*sub.tasks, return_exceptions=True)
+
+
+# -----------------------------
+# 2️⃣ Strategy books
+# -----------------------------
+@dataclass(frozen=True)
+class StrategyBook:
+    """One strategy on one granularity, with the parameters run_symbol used to hardcode."""
+    name: str
+    strategy: object                      # strategy(df, backcandles, ATR_multiplier_SL) → df
+    account: str = "mean"                 # key into TradingBot.clients: whose account trades it
+    tag: str = "bk"                       # 2-char client order id prefix
+    granularity: str = 'M5'
+    count: int = None                     # candles the strategy evaluates (forming one included);
+                                          # None: the minimum its declared lookbacks need
+    backcandles: int = 15
+    units: int = 1000
+    ATR_multiplier_SL: float = 1.0
+    ATR_multiplier_TP: float = 1.5
+    log_columns: tuple = ('Close', 'atr', 'TotalSignal')
+    executor: str = "loop"                # "loop" or "process"
+
+    def history(self) -> int:
+        """Complete bars evaluate_book hands to the strategy."""
+        if self.count is not None:
+            return self.count - 1
+        lookbacks = getattr(self.strategy, 'lookbacks', ()) + (Lookback('backcandles', self.backcandles),)
+        return required_bars(lookbacks, granularity=self.granularity)
+
+
+def evaluate_book(book: StrategyBook, event: BarClosed):
+    """BarClosed → SignalGenerated or BarEvaluated. Module-level so it can run in a process pool."""
+    bars = event.bars.iloc[-book.history():]
+    if len(bars) < book.backcandles:
+        return None
+    last, intent = evaluate_bar(event.symbol, bars.copy(), book.strategy, book.backcandles, book.units,
+                                book.ATR_multiplier_SL, book.ATR_multiplier_TP)
+    if intent is None:
+        return BarEvaluated(book.name, event.symbol, event.time, last)
+    return SignalGenerated(book.name, intent, bar_fields(last, book.log_columns), last)
+
+
+# -----------------------------
+# 3️⃣ Trading bot
+# -----------------------------
+class TradingBot:
+    """
+    Event-sourced trading core hosting several strategy books over one market-data feed.
+
+    Candles are fetched and parsed once per symbol, at the finest granularity any book
+    uses, into a BarRingBuffer; coarser bars are built from those with build_bars. So an
+    M1 VWAP/RSI book and an M5 mean-reversion book share a single fetch, even when they
+    trade on different accounts.
+    The flow is BarClosed → (book handlers) → SignalGenerated → (order handler) →
+    OrderSubmitted → OrderFilled / OrderAccepted / OrderFailed, all over the EventBus.
+    Once a bar's books are all evaluated, each account's signals go through its
+    OrderBatcher stages as one batch (spread gate, sizing, correlation, exposure, as in
+    main.py), at that account's finest granularity, and the admitted orders are sent
+    through its OrderTracker with a client id; the tracker's state changes come back
+    as the Order* events. Every evaluated bar is recorded in `journal` when given.
+    Symbols are only polled while `calendar` has their market open; when every market
+    is closed the loop sleeps to the next open and refreshes the buffers `warm_lead`
+    seconds before it.
+    """
+
+    def __init__(self, symbols, books, fetch, clients, batchers, trackers, journal=None,
+                 max_concurrent_fetches: int = 16, processes: int = None, sink=None, close_deadline: float = 5.0,
+                 calendar: MarketCalendar = None, warm_lead: float = 60.0):
+        self.symbols = list(symbols)
+        self.books = {b.name: b for b in books}
+        self.fetch = fetch                        # fetch(symbol, fields, count=, granularity=, price=) → candles
+        self.clients = clients                    # account → client with order_data(units, side, sl, tp, symbol)
+        self.batchers = batchers                  # account → OrderBatcher (run with decide())
+        self.trackers = trackers                  # account → started OrderTracker
+        self.journal = journal
+        self.close_deadline = close_deadline      # seconds to wait for OANDA to finalize a bar
+        self.calendar = calendar or MarketCalendar()
+        self.warm_lead = warm_lead
+        self.bus = EventBus(sink=sink)
+        self.granularities = sorted({b.granularity for b in books}, key=GRANULARITY_SECONDS.get)
+        self.base = self.granularities[0]
+        # enough base bars to rebuild every book's history (+1 bar: the oldest coarse bar may be partial)
+        capacity = max((b.history() + 1) * GRANULARITY_SECONDS[b.granularity] // GRANULARITY_SECONDS[self.base]
+                       for b in books)
+        # one fetch serves every book, so it carries the union of the columns they read (+ the
+        # close bid/ask for the spread gate)
+        fields = candle_fields(*(getattr(b.strategy, 'columns', CANDLE_FIELDS) for b in books), ('bid_c', 'ask_c'))
+        self.buffers = {s: BarRingBuffer(capacity, fields, instrument=s, granularity=self.base) for s in self.symbols}
+        self._last_bar = {}
+        self._last_trade = {}
+        # account → the granularity its batch runs at (its finest book's)
+        self._cycles = {}
+        for book in sorted(books, key=lambda b: GRANULARITY_SECONDS[b.granularity], reverse=True):
+            self._cycles[book.account] = book.granularity
+        self._signals = defaultdict(list)         # account → this cycle's SignalGenerated
+        self._sent = {}                           # client id → (book, intent) until the order is final
+        self._loop = None
+        for tracker in trackers.values():
+            tracker.listeners.append(self._order_update)
+        self._fetch_slots = threading.BoundedSemaphore(max_concurrent_fetches)  # held per HTTP call only
+        self._pool = ProcessPoolExecutor(processes) if any(b.executor == "process" for b in books) else None
+
+        for book in books:
+            self.bus.subscribe(BarClosed, partial(evaluate_book, book),
+                               where=partial(lambda g, ev: ev.granularity == g, book.granularity),
+                               executor=self._pool if book.executor == "process" else None)
+        self.bus.subscribe(SignalGenerated, self._signal)
+        if journal is not None:
+            self.bus.subscribe(BarEvaluated, self._record)
+
+    # -----------------------------
+    # Market data
+    # -----------------------------
+    def _bars(self, symbol: str, granularity: str) -> pd.DataFrame:
+        frame = self.buffers[symbol].frame()
+        if granularity == self.base:
+            return frame.copy()  # detach from the buffer: handlers run after it moves on
+        step = GRANULARITY_SECONDS[self.base]
+        now = frame.index[-1] + pd.Timedelta(seconds=step)
+        bars = prepare_candles(build_bars(frame.reset_index(), granularity, now=now)).iloc[1:]  # oldest may be partial
+        bars.attrs.update(instrument=symbol, granularity=granularity)
+        return bars
+
+    async def _poll(self, symbol: str, close_time: datetime) -> None:
+        buffer = self.buffers[symbol]
+        fetch = partial(self._fetch, symbol, buffer)
+        try:
+            bar = await await_bar_close_async(buffer, fetch, close_time, self.base, self.close_deadline)
+        except Exception as e:
+            log_event(log, "fetch_error", level=logging.ERROR, symbol=symbol, error=str(e))
+            return
+        log_event(log, "bar_close", level=logging.INFO if bar.confirmed else logging.WARNING,
+                  sample=symbol if bar.confirmed else None, symbol=symbol, confirmed=bar.confirmed,
+                  latency_ms=round(bar.latency * 1e3, 1), attempts=bar.attempts)
+        if not bar.new_bars:
+            return
+        for granularity in self.granularities:
+            bars = self._bars(symbol, granularity)
+            if not len(bars):
+                continue
+            t = bars.index[-1]
+            if self._last_bar.get((symbol, granularity)) != t:
+                self._last_bar[(symbol, granularity)] = t
+                await self.bus.publish(BarClosed(symbol, granularity, t, bars))
+
+    def _fetch(self, symbol: str, buffer: BarRingBuffer, count: int):
+        with self._fetch_slots:
+            return self.fetch(symbol, buffer.source_fields, count=count, granularity=self.base, price=buffer.price)
+
+    # -----------------------------
+    # Orders
+    # -----------------------------
+    def _signal(self, event: SignalGenerated) -> None:
+        """Hold the signal for its account's batch (one per symbol, book and bar)."""
+        intent = event.intent
+        key = (event.book, intent.symbol)
+        if self._last_trade.get(key) == intent.time:
+            return
+        self._last_trade[key] = intent.time
+        self._signals[self.books[event.book].account].append(event)
+
+    def _record(self, event: BarEvaluated) -> None:
+        self.journal.record(event.symbol, event.book, event.time, event.last)
+
+    def _cycle_prices(self):
+        closes, spreads = {}, {}
+        for symbol, buffer in self.buffers.items():
+            if len(buffer):
+                closes[symbol] = float(buffer.view('Close')[-1])
+                spreads[symbol] = float(buffer.view('ask_c')[-1] - buffer.view('bid_c')[-1])
+        return closes, spreads
+
+    async def _route(self, close_time: datetime) -> None:
+        """Run each account's batch due at `close_time` and send what it admits."""
+        closes = spreads = None
+        for account, granularity in self._cycles.items():
+            if int(close_time.timestamp()) % GRANULARITY_SECONDS[granularity]:
+                continue
+            if closes is None:
+                closes, spreads = self._cycle_prices()
+            signals = self._signals.pop(account, [])
+            try:
+                admitted = await asyncio.to_thread(self.batchers[account].decide, close_time, closes, spreads,
+                                                   [e.intent for e in signals])
+            except Exception as e:
+                log_event(log, "batch_error", level=logging.ERROR, exc_info=True, account=account, error=str(e))
+                continue
+            admitted = {id(i) for i in admitted}
+            for event in signals:
+                await self._send(account, event, id(event.intent) in admitted)
+
+    async def _send(self, account: str, event: SignalGenerated, admitted: bool) -> None:
+        intent = event.intent
+        book = self.books[event.book]
+        client_id = None
+        if admitted:
+            client_id = client_order_id(book.tag, intent.symbol, intent.time)
+            self._sent[client_id] = (event.book, intent)
+            await self.bus.publish(OrderSubmitted(event.book, intent))
+            # fire and track: fills and rejects come back through _order_update
+            self.trackers[account].submit(self.clients[account].order_data(
+                intent.units, intent.side, intent.sl_price, intent.tp_price, intent.symbol), client_id)
+        log_event(log, "signal", book=event.book, account=account, symbol=intent.symbol, time=intent.time,
+                  side=intent.side, units=intent.units, admitted=admitted, client_id=client_id, **event.bar)
+        if self.journal is not None:
+            self.journal.record(intent.symbol, event.book, intent.time, event.last,
+                                intent if admitted else None, client_id)
+
+    def _order_update(self, order) -> None:
+        """OrderTracker listener (tracker threads): a sent order's state change as an Order* event."""
+        sent = self._sent.get(order.client_id)
+        if sent is None or self._loop is None:
+            return
+        book, intent = sent
+        fields = {k: v for k, v in (("order_id", order.order_id), ("trade_id", order.trade_id),
+                                    ("fill_price", order.fill_price), ("ack_ms", order.ack_ms),
+                                    ("fill_ms", order.fill_ms)) if v is not None}
+        if order.state == "accepted":
+            event = OrderAccepted(book, intent, fields)
+        elif order.state == "filled":
+            event = OrderFilled(book, intent, fields)
+        elif order.state in FINAL_STATES:
+            event = OrderFailed(book, intent, order.reason or order.state)
+        else:
+            return
+        if order.state in FINAL_STATES:
+            self._sent.pop(order.client_id, None)
+        asyncio.run_coroutine_threadsafe(self.bus.publish(event), self._loop)
+
+    # -----------------------------
+    # Run loop
+    # -----------------------------
+    async def _warm(self, symbol: str) -> None:
+        buffer = self.buffers[symbol]
+        try:
+            await asyncio.to_thread(buffer.refresh, partial(self._fetch, symbol, buffer))
+        except Exception as e:
+            log_event(log, "fetch_error", level=logging.ERROR, symbol=symbol, error=str(e))
+
+    async def _sleep_until_open(self, now: datetime) -> None:
+        """Every market is closed: sleep to the next open, warming those symbols' buffers just before."""
+        opens = {s: self.calendar.next_open(s, now) for s in self.symbols}
+        reopen = min(opens.values())
+        log_event(log, "market_closed", reopen=reopen)
+        await asyncio.sleep(max(0.0, (reopen - now).total_seconds() - self.warm_lead))
+        await asyncio.gather(*(self._warm(s) for s, t in opens.items() if t == reopen))
+        await asyncio.sleep(max(0.0, (reopen - datetime.now(timezone.utc)).total_seconds()))
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.bus.start()
+        try:
+            while True:
+                now = datetime.now(timezone.utc)
+                if not self.calendar.open_symbols(self.symbols, now):
+                    await self._sleep_until_open(now)
+                    continue
+                close_time = next_bar_close(now, self.base)
+                await asyncio.sleep((close_time - now).total_seconds())
+                bar_start = close_time - timedelta(seconds=GRANULARITY_SECONDS[self.base])
+                polled = self.calendar.open_symbols(self.symbols, bar_start)
+                await asyncio.gather(*(self._poll(s, close_time) for s in self.symbols if s in polled))
+                # every book has seen the bar and held its signals: batch and send them per account
+                await self.bus.drain(BarClosed, SignalGenerated)
+                await self._route(close_time)
+        finally:
+            await self.bus.stop()
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
@@ -3,6 +3,8 @@ import numpy as np
 np.NaN = np.nan
 import pandas_ta as ta
 import pandas as pd
+from utils.indicator_cache import cached_indicator
+from utils.lookback import Lookback
 
 
 def mean_reversion_scalping(df, lookback=20, z_score_threshold=2, stop_loss_pips=10, take_profit_pips=5):
@@ -17,10 +19,11 @@ def mean_reversion_scalping(df, lookback=20, z_score_threshold=2, stop_loss_pips
     """
 
     # Calculate indicators
-    df['SMA'] = df['Close'].rolling(window=lookback).mean()
-    df['STD'] = df['Close'].rolling(window=lookback).std()
-    df['atr'] = ta.atr(df['High'], df['Low'], df['Close'], length=14)
-    df['RSI'] = ta.rsi(df['Close'], length=14)
+    # (shared across strategies through the indicator cache when df comes from a live buffer)
+    df['SMA'] = cached_indicator(df, 'sma', (lookback,), lambda: df['Close'].rolling(window=lookback).mean())
+    df['STD'] = cached_indicator(df, 'std', (lookback,), lambda: df['Close'].rolling(window=lookback).std())
+    df['atr'] = cached_indicator(df, 'atr', (14,), lambda: ta.atr(df['High'], df['Low'], df['Close'], length=14))
+    df['RSI'] = cached_indicator(df, 'rsi', (14,), lambda: ta.rsi(df['Close'], length=14))
     df['Z_Score'] = (df['Close'] - df['SMA']) / df['STD']
 
     # Generate signals
@@ -28,3 +31,12 @@ def mean_reversion_scalping(df, lookback=20, z_score_threshold=2, stop_loss_pips
     df.loc[df['Z_Score'] < -z_score_threshold, 'TotalSignal'] = 1  # Buy signal (oversold)
     df.loc[df['Z_Score'] > z_score_threshold, 'TotalSignal'] = 2  # Sell signal (overbought)
     return df
+
+
+# Candle columns the strategy reads: the fetch layer requests and parses only these
+mean_reversion_scalping.columns = ('High', 'Low', 'Close')
+# Indicator history it needs: sizes the fetch and the buffer. SMA/STD run over the call's
+# `lookback`, which evaluate_bar passes as backcandles: callers add Lookback('backcandles', ...)
+mean_reversion_scalping.lookbacks = (
+    Lookback('atr', 14, 'wilder', diff=1), Lookback('rsi', 14, 'wilder', diff=1),
+)
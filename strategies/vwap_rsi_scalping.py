@@ -3,14 +3,16 @@ import numpy as np
 np.NaN = np.nan
 import pandas_ta as ta
 import pandas as pd
+from utils.indicator_cache import cached_indicator
+from utils.lookback import Lookback
 
 def strategy(df : pd.DataFrame, backcandles: int, ATR_multiplier: float) -> pd.DataFrame:
     last_trade_time = None  # to prevent repeated trades per candle
-    df['VWAP'] = ta.vwap(df['High'], df['Low'], df['Close'], df['Volume'])
-    df['RSI'] = ta.rsi(df['Close'], length=16)
-    bb = ta.bbands(df['Close'], length=14, std=2.0)
+    df['VWAP'] = cached_indicator(df, 'vwap', (), lambda: ta.vwap(df['High'], df['Low'], df['Close'], df['Volume']))
+    df['RSI'] = cached_indicator(df, 'rsi', (16,), lambda: ta.rsi(df['Close'], length=16))
+    bb = cached_indicator(df, 'bbands', (14, 2.0), lambda: ta.bbands(df['Close'], length=14, std=2.0))
+    df['atr'] = cached_indicator(df, 'atr', (14,), lambda: ta.atr(df['High'], df['Low'], df['Close'], length=14))
     df = df.join(bb)
-    df['atr'] = ta.atr(df['High'], df['Low'], df['Close'], length=14)
     df['upper_band'] = df['Close'] + df['atr'] * 1.5
     df['lower_band'] = df['Close'] - df['atr'] * 1.5
     df.reset_index(inplace=True)
@@ -40,4 +42,11 @@ def strategy(df : pd.DataFrame, backcandles: int, ATR_multiplier: float) -> pd.D
     
     return df
 
-    
\ No newline at end of file
+
+# Candle columns the strategy reads: the fetch layer requests and parses only these
+strategy.columns = ('High', 'Low', 'Close', 'Volume')
+# Indicator history it needs: sizes the fetch and the buffer (VWAP is anchored on the day)
+strategy.lookbacks = (
+    Lookback('vwap', 0, 'session'), Lookback('rsi', 16, 'wilder', diff=1),
+    Lookback('bbands', 14), Lookback('atr', 14, 'wilder', diff=1),
+)
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+import requests
+from oandapyV20 import API
+from oandapyV20.exceptions import V20Error
+
+from utils.log import get_logger, log_event
+
+log = get_logger("api")
+
+# -----------------------------
+# 0️⃣ Timeouts
+# -----------------------------
+# (connect, read) seconds for every REST call; without them a dead TCP connection blocks
+# the calling thread forever. Streams read a heartbeat every 5s, so 10s also bounds them.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+
+
+# -----------------------------
+# 1️⃣ Circuit breaker
+# -----------------------------
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"{endpoint}: circuit open, retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def is_outage(exc: Exception) -> bool:
+    """Failures that say the endpoint is down (not that the request was wrong)."""
+    if isinstance(exc, requests.RequestException):
+        return True  # timeouts, refused / reset connections
+    if isinstance(exc, V20Error):
+        return exc.code == 429 or exc.code >= 500
+    return False
+
+
+class _Circuit:
+    __slots__ = ("failures", "opened_at", "probing")
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+
+class CircuitBreaker:
+    """
+    One circuit per endpoint (InstrumentsCandles, OrderCreate, ...).
+
+    After `failure_threshold` consecutive outage failures the circuit opens and calls
+    fail fast with CircuitOpenError for `reset_timeout` seconds, instead of every
+    symbol thread waiting out its own timeout. Then a single trial call goes through
+    (half-open): success closes the circuit, another outage reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def is_open(self, endpoint: str) -> bool:
+        circuit = self._circuits.get(endpoint)
+        return circuit is not None and circuit.opened_at is not None
+
+    def call(self, endpoint: str, fn, *args, **kwargs):
+        with self._lock:
+            circuit = self._circuits.setdefault(endpoint, _Circuit())
+            if circuit.opened_at is not None:
+                retry_in = circuit.opened_at + self.reset_timeout - time.monotonic()
+                if retry_in > 0 or circuit.probing:
+                    raise CircuitOpenError(endpoint, max(retry_in, 0.0))
+                circuit.probing = True
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record(endpoint, circuit, outage=is_outage(e), error=e)
+            raise
+        self._record(endpoint, circuit, outage=False)
+        return result
+
+    def _record(self, endpoint: str, circuit: _Circuit, outage: bool, error=None) -> None:
+        with self._lock:
+            was_open = circuit.opened_at is not None
+            if not outage:
+                circuit.failures, circuit.opened_at, circuit.probing = 0, None, False
+                if was_open:
+                    log_event(log, "circuit_closed", endpoint=endpoint)
+                return
+            circuit.failures += 1
+            if circuit.probing or circuit.failures >= self.failure_threshold:
+                circuit.opened_at, circuit.probing = time.monotonic(), False
+                if not was_open:
+                    log_event(log, "circuit_open", level=logging.ERROR, endpoint=endpoint,
+                              failures=circuit.failures, error=str(error))
+
+
+# -----------------------------
+# 2️⃣ API client
+# -----------------------------
+class GuardedAPI(API):
+    """oandapyV20 API with connect/read timeouts and a circuit breaker around every request."""
+
+    def __init__(self, access_token, environment: str = "practice", headers=None, request_params=None,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), breaker: CircuitBreaker = None):
+        request_params = dict(request_params or {})
+        request_params.setdefault("timeout", timeout)
+        super().__init__(access_token, environment=environment, headers=headers, request_params=request_params)
+        self.breaker = breaker or CircuitBreaker()
+
+    def request(self, endpoint):
+        return self.breaker.call(type(endpoint).__name__, super().request, endpoint)
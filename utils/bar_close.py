@@ -0,0 +1,78 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import pandas as pd
+
+from utils.bars import GRANULARITY_SECONDS
+
+# -----------------------------
+# 0️⃣ Bar boundaries
+# -----------------------------
+def next_bar_close(now: datetime, granularity: str) -> datetime:
+    """The next close of a `granularity` bar strictly after `now` (bars are aligned to the epoch)."""
+    step = GRANULARITY_SECONDS[granularity]
+    ts = now.timestamp()
+    return datetime.fromtimestamp((ts // step + 1) * step, timezone.utc)
+
+
+# -----------------------------
+# 1️⃣ Confirmation poller
+# -----------------------------
+@dataclass(slots=True)
+class BarClose:
+    new_bars: int          # bars appended to the buffer while waiting
+    confirmed: bool        # the bar that closed at `close_time` is in the buffer
+    latency: float         # seconds from the bar's close to confirmation (or to giving up)
+    attempts: int
+
+
+def await_bar_close(buffer, fetch, close_time: datetime, granularity: str, deadline: float = 10.0,
+                    first_delay: float = 0.1, backoff: float = 1.5, max_delay: float = 1.0) -> BarClose:
+    """
+    Refresh `buffer` until the bar that closed at `close_time` is marked complete.
+
+    OANDA can take a moment to finalize a bar after the boundary; a single fetch at the
+    boundary would then only see the previous bar. Retries back off from `first_delay`
+    to `max_delay` and stop `deadline` seconds after the close, so the decision runs on
+    the new bar as soon as it exists and never waits more than the deadline.
+    """
+    expected = pd.Timestamp(close_time).value - GRANULARITY_SECONDS[granularity] * 10**9
+    close_ts = close_time.timestamp()
+    new_bars = attempts = 0
+    delay = first_delay
+    while True:
+        new_bars += buffer.refresh(fetch)
+        attempts += 1
+        latency = time.time() - close_ts
+        if buffer.last_time is not None and buffer.last_time >= expected:
+            return BarClose(new_bars, True, latency, attempts)
+        if latency + delay > deadline:
+            return BarClose(new_bars, False, latency, attempts)
+        time.sleep(delay)
+        delay = min(delay * backoff, max_delay)
+
+
+async def await_bar_close_async(buffer, fetch, close_time: datetime, granularity: str, deadline: float = 10.0,
+                                first_delay: float = 0.1, backoff: float = 1.5, max_delay: float = 1.0) -> BarClose:
+    """
+    await_bar_close for an asyncio loop: the waits between polls are asyncio.sleep.
+
+    Only the refresh itself runs in a worker thread, so symbols waiting for OANDA to
+    finalize their bar hold no executor thread and cannot starve the others (or the
+    orders queued behind them).
+    """
+    expected = pd.Timestamp(close_time).value - GRANULARITY_SECONDS[granularity] * 10**9
+    close_ts = close_time.timestamp()
+    new_bars = attempts = 0
+    delay = first_delay
+    while True:
+        new_bars += await asyncio.to_thread(buffer.refresh, fetch)
+        attempts += 1
+        latency = time.time() - close_ts
+        if buffer.last_time is not None and buffer.last_time >= expected:
+            return BarClose(new_bars, True, latency, attempts)
+        if latency + delay > deadline:
+            return BarClose(new_bars, False, latency, attempts)
+        await asyncio.sleep(delay)
+        delay = min(delay * backoff, max_delay)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# 0️⃣ Granularities
+# -----------------------------
+GRANULARITY_SECONDS = {
+    'S5': 5, 'S10': 10, 'S15': 15, 'S30': 30,
+    'M1': 60, 'M2': 120, 'M4': 240, 'M5': 300, 'M10': 600, 'M15': 900, 'M30': 1800,
+    'H1': 3600, 'H2': 7200, 'H3': 10800, 'H4': 14400, 'H6': 21600, 'H8': 28800, 'H12': 43200,
+    'D': 86400,
+}
+COMPONENTS = ('mid', 'bid', 'ask')
+FIELDS = ('o', 'h', 'l', 'c')
+
+
+def granularity_ns(granularity: str) -> int:
+    return GRANULARITY_SECONDS[granularity] * 1_000_000_000
+
+
+def time_ns(values) -> np.ndarray:
+    """UTC timestamps (strings, datetimes or a datetime column) as int64 epoch nanoseconds."""
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).as_unit('ns').asi8
+
+
+# -----------------------------
+# 1️⃣ Bar builder
+# -----------------------------
+def _quote_columns(quotes: pd.DataFrame) -> dict:
+    """Return {component_field: array} for ticks (time/bid/ask) or sub-bar candles (bid_o..ask_c)."""
+    cols = {}
+    if 'bid' in quotes and 'ask' in quotes:  # ticks: every field is the tick price
+        bid = quotes['bid'].to_numpy(np.float64)
+        ask = quotes['ask'].to_numpy(np.float64)
+        mid = (bid + ask) / 2
+        for comp, arr in (('mid', mid), ('bid', bid), ('ask', ask)):
+            for f in FIELDS:
+                cols[f"{comp}_{f}"] = arr
+        return cols
+    for comp in COMPONENTS:
+        for f in FIELDS:
+            name = f"{comp}_{f}"
+            if name in quotes:
+                cols[name] = quotes[name].to_numpy(np.float64)
+    if 'mid_o' not in cols and 'bid_o' in cols:
+        # No stored mid: derive it per sub-bar (exact for o/c, an approximation for h/l)
+        for f in FIELDS:
+            cols[f"mid_{f}"] = (cols[f"bid_{f}"] + cols[f"ask_{f}"]) / 2
+    return cols
+
+
+def build_bars(quotes: pd.DataFrame, granularity: str = 'M5', now=None) -> pd.DataFrame:
+    """
+    Aggregate ticks or finer candles into OANDA-style candles.
+
+    The output has exactly the candles_to_df layout (time, complete, volume, mid_*,
+    bid_*, ask_*), so it goes through prepare_candles and the strategies unchanged.
+    Bars are stamped with their open time; every bar but the last is complete, and
+    the last one is complete only if `now` is at or past its close.
+    """
+    if len(quotes) == 0:
+        return pd.DataFrame(columns=['time', 'complete', 'volume'])
+    t = time_ns(quotes['time'])
+    step = granularity_ns(granularity)
+    bucket = t // step
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(t)] - 1
+
+    if 'volume' in quotes and 'bid' not in quotes:
+        volume = np.add.reduceat(quotes['volume'].to_numpy(np.int64), starts)
+    else:
+        volume = np.diff(np.r_[starts, len(t)])  # tick count, as OANDA reports it
+
+    out = {
+        'time': pd.to_datetime(bucket[starts] * step, utc=True),
+        'complete': np.ones(len(starts), dtype=bool),
+        'volume': volume,
+    }
+    for name, arr in _quote_columns(quotes).items():
+        field = name[-1]
+        if field == 'o':
+            out[name] = arr[starts]
+        elif field == 'h':
+            out[name] = np.maximum.reduceat(arr, starts)
+        elif field == 'l':
+            out[name] = np.minimum.reduceat(arr, starts)
+        else:
+            out[name] = arr[ends]
+
+    last_close = (bucket[starts[-1]] + 1) * step
+    if now is None or pd.Timestamp(now).value < last_close:
+        out['complete'][-1] = False
+    return pd.DataFrame(out)
@@ -0,0 +1,146 @@
+import threading
+import numpy as np
+
+# -----------------------------
+# 0️⃣ Incremental rolling correlation
+# -----------------------------
+class RollingCorrelation:
+    """
+    Rolling correlation of per-bar log returns across a fixed symbol universe.
+
+    Keeps the last `window` return vectors in a ring plus their running sum and sum of
+    outer products, so each new bar costs one O(N²) rank-1 add/remove instead of a
+    full recomputation. The sums are rebuilt from the ring once per `window` updates
+    to keep floating-point drift in check.
+    """
+
+    def __init__(self, symbols, window: int = 288):
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.window = window
+        self._ring = np.zeros((window, n))
+        self._sum = np.zeros(n)
+        self._outer = np.zeros((n, n))
+        self._prev = np.full(n, np.nan)
+        self._before = self._prev         # closes as of the bar before the last update
+        self._pos = 0
+        self.count = 0
+
+    def update(self, closes: dict) -> None:
+        """Add one bar: {symbol: close}. Missing or first-seen symbols contribute a zero return."""
+        c = np.full(len(self.symbols), np.nan)
+        for sym, close in closes.items():
+            i = self.index.get(sym)
+            if i is not None and close is not None:
+                c[i] = close
+        r = np.log(c / self._prev)
+        r[~np.isfinite(r)] = 0.0
+        self._before = self._prev
+        self._prev = np.where(np.isnan(c), self._prev, c)
+
+        old = self._ring[self._pos]
+        self._sum += r - old
+        self._outer += np.outer(r, r) - np.outer(old, old)
+        self._ring[self._pos] = r
+        self._pos = (self._pos + 1) % self.window
+        self.count += 1
+        if self._pos == 0:
+            self._sum = self._ring.sum(axis=0)
+            self._outer = self._ring.T @ self._ring
+
+    def amend(self, closes: dict) -> None:
+        """Fill in closes that arrived after their bar was added: the last bar's returns are redone."""
+        c = np.full(len(self.symbols), np.nan)
+        for sym, close in closes.items():
+            i = self.index.get(sym)
+            if i is not None and close is not None:
+                c[i] = close
+        seen = ~np.isnan(c)
+        if not seen.any():
+            return
+        self._prev = np.where(seen, c, self._prev)
+        if self.count == 0:
+            return
+        row = (self._pos - 1) % self.window
+        old = self._ring[row].copy()
+        new = old.copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.log(c[seen] / self._before[seen])
+        new[seen] = np.where(np.isfinite(r), r, 0.0)
+        self._sum += new - old
+        self._outer += np.outer(new, new) - np.outer(old, old)
+        self._ring[row] = new
+
+    def matrix(self) -> np.ndarray:
+        """Current N×N correlation matrix (0 where a symbol had no variance)."""
+        w = min(self.count, self.window)
+        if w < 2:
+            return np.zeros_like(self._outer)
+        mean = self._sum / w
+        cov = self._outer / w - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = 0.0
+        return corr
+
+
+# -----------------------------
+# 1️⃣ Order batch stage
+# -----------------------------
+class CorrelationFilter:
+    """
+    OrderBatcher stage that dedupes (or scales) orders that are the same bet.
+
+    Two orders overlap by corr(i, j) · dir(i) · dir(j): a EUR_USD buy and a GBP_USD buy
+    overlap positively, a USD_CHF sell does too. Orders are admitted in universe
+    order, after those their cycle already admitted (a late batch's `admitted`); in
+    "dedupe" mode an order whose overlap with an admitted one exceeds `threshold` is
+    dropped, in "scale" mode its units are divided by 1 + Σ positive overlaps above
+    the threshold.
+    """
+
+    def __init__(self, symbols, window: int = 288, threshold: float = 0.8, mode: str = "dedupe",
+                 min_periods: int = None):
+        self.corr = RollingCorrelation(symbols, window)
+        self.threshold = threshold
+        self.mode = mode
+        self.min_periods = min_periods if min_periods is not None else window // 2
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        with self._lock:
+            if not batch.late:
+                self.corr.update(batch.closes)
+            else:
+                self.corr.amend(batch.closes)  # a straggler's close still belongs to its bar
+            if self.corr.count < self.min_periods:
+                return batch.intents
+            matrix = self.corr.matrix()
+
+        order = sorted(batch.intents, key=lambda i: self.corr.index.get(i.symbol, len(self.corr.index)))
+        admitted, idx, dirs = [], [], []
+        # a late batch's stragglers rank after the orders their cycle already admitted
+        for intent in batch.admitted:
+            i = self.corr.index.get(intent.symbol)
+            if i is not None:
+                idx.append(i)
+                dirs.append(1.0 if intent.side == "buy" else -1.0)
+        for intent in order:
+            i = self.corr.index.get(intent.symbol)
+            d = 1.0 if intent.side == "buy" else -1.0
+            if i is not None and idx:
+                overlap = matrix[i, idx] * d * np.asarray(dirs)
+                overlap = overlap[overlap > self.threshold]
+                if len(overlap):
+                    if self.mode == "dedupe":
+                        continue
+                    intent.units = int(intent.units / (1.0 + overlap.sum()))
+                    if intent.units <= 0:
+                        continue
+            admitted.append(intent)
+            if i is not None:
+                idx.append(i)
+                dirs.append(d)
+        return admitted
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from oandapyV20.endpoints import positions
+
+# -----------------------------
+# 0️⃣ Cached conversion rates
+# -----------------------------
+class ConversionRates:
+    """
+    Home-currency value of one unit of every currency in the pair universe.
+
+    The conversion paths are solved once (breadth-first over the pair graph from the
+    home currency) into an exponent matrix, so refreshing every rate from the latest
+    closes is one matrix-vector product in log space: value = exp(M @ log(price)).
+    """
+
+    def __init__(self, symbols, home: str = "USD"):
+        self.symbols = list(symbols)
+        self.pair_index = {s: i for i, s in enumerate(self.symbols)}
+        currencies = sorted({c for s in self.symbols for c in s.split("_")} | {home})
+        self.currencies = currencies
+        self.index = {c: i for i, c in enumerate(currencies)}
+        self.base = np.array([self.index[s.split("_")[0]] for s in self.symbols])
+        self.quote = np.array([self.index[s.split("_")[1]] for s in self.symbols])
+        self.home = home
+        self._paths = self._solve_paths()
+        self.log_price = np.full(len(self.symbols), np.nan)
+        self.value = np.full(len(currencies), np.nan)
+        self.value[self.index[home]] = 1.0
+
+    def _solve_paths(self) -> np.ndarray:
+        n_ccy, n_pair = len(self.currencies), len(self.symbols)
+        paths = np.zeros((n_ccy, n_pair))
+        reachable = {self.index[self.home]}
+        queue = deque([self.index[self.home]])
+        while queue:
+            c = queue.popleft()
+            for p in range(n_pair):
+                b, q = self.base[p], self.quote[p]
+                if q == c and b not in reachable:      # value[b] = price * value[q]
+                    paths[b] = paths[q]
+                    paths[b, p] += 1
+                    reachable.add(b)
+                    queue.append(b)
+                elif b == c and q not in reachable:    # value[q] = value[b] / price
+                    paths[q] = paths[b]
+                    paths[q, p] -= 1
+                    reachable.add(q)
+                    queue.append(q)
+        paths[[i for i in range(n_ccy) if i not in reachable]] = np.nan
+        return paths
+
+    def update(self, closes: dict) -> None:
+        for sym, close in closes.items():
+            i = self.pair_index.get(sym)
+            if i is not None and close:
+                self.log_price[i] = np.log(close)
+        known = ~np.isnan(self.log_price)
+        self.value = np.exp(np.nan_to_num(self._paths) @ np.where(known, self.log_price, 0.0))
+        # unreachable currencies, or a price on the path not seen yet → unknown
+        needs_missing = ((self._paths != 0) & ~known).any(axis=1)
+        self.value[needs_missing | np.isnan(self._paths).any(axis=1)] = np.nan
+        self.value[self.index[self.home]] = 1.0
+
+    def price(self, symbols) -> np.ndarray:
+        idx = np.array([self.pair_index[s] for s in symbols], dtype=np.int64)
+        return np.exp(self.log_price[idx])
+
+    def matrix(self) -> np.ndarray:
+        """C×C cross-rate matrix: units of column currency per unit of row currency."""
+        return self.value[:, None] / self.value[None, :]
+
+
+def currency_exposure(rates: ConversionRates, symbols, units) -> np.ndarray:
+    """
+    Per-currency home-value exposure of `units` (signed, in base currency) of each pair:
+    +units of the base currency, -units·price of the quote currency.
+    """
+    idx = np.array([rates.pair_index[s] for s in symbols], dtype=np.int64)
+    units = np.asarray(units, dtype=np.float64)
+    base = rates.base[idx]
+    quote = rates.quote[idx]
+    long_base = units * rates.value[base]
+    short_quote = -units * np.exp(rates.log_price[idx]) * rates.value[quote]
+    n = len(rates.currencies)
+    exposure = np.bincount(base, np.nan_to_num(long_base), minlength=n)
+    exposure += np.bincount(quote, np.nan_to_num(short_quote), minlength=n)
+    return exposure
+
+
+# -----------------------------
+# 1️⃣ Open positions
+# -----------------------------
+def fetch_open_units(api, account_id) -> dict:
+    """Net open units per instrument from one OpenPositions call."""
+    r = positions.OpenPositions(accountID=account_id)
+    response = api.request(r)
+    return {
+        p["instrument"]: float(p["long"]["units"]) + float(p["short"]["units"])
+        for p in response["positions"]
+    }
+
+
+# -----------------------------
+# 2️⃣ Order batch stage
+# -----------------------------
+class ExposureNetting:
+    """
+    OrderBatcher stage that keeps per-currency net exposure within limits.
+
+    Pending orders and open positions are decomposed into per-currency exposure
+    vectors in the home currency. For every currency whose total would breach its
+    limit, the orders pushing it further are scaled by the fraction of the remaining
+    headroom they can share; each order takes the smallest factor over its two
+    currencies, and orders scaled below `min_units` are dropped. Open positions come
+    from `positions_fn`, refreshed once per batch on a background thread: the stage
+    only reads the cached table, so no order waits on the REST call. Orders it admits
+    count as open until a refresh that started after them lands, so late stragglers
+    are netted against the orders already sent in their cycle.
+    """
+
+    def __init__(self, symbols, limit: float = 50_000, limits: dict = None, home: str = "USD",
+                 positions_fn=None, min_units: int = 1):
+        self.rates = ConversionRates(symbols, home)
+        self.limits = np.full(len(self.rates.currencies), float(limit))
+        for ccy, value in (limits or {}).items():
+            if ccy in self.rates.index:
+                self.limits[self.rates.index[ccy]] = value
+        self.positions_fn = positions_fn
+        self.min_units = min_units
+        self.open_units = {}
+        self._admitted = []         # (time.monotonic(), symbol, signed units) not yet in a refresh
+        self._lock = threading.Lock()
+        self._fetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="positions")
+        self._fetching = None
+        if positions_fn is not None:
+            self._fetching = self._fetcher.submit(self._fetch_positions)
+
+    def _fetch_positions(self) -> None:
+        started = time.monotonic()
+        try:
+            units = dict(self.positions_fn())
+        except Exception:
+            return  # keep the last known positions
+        with self._lock:
+            # orders admitted after the request went out are not in its answer yet
+            self._admitted = [a for a in self._admitted if a[0] >= started]
+            for _, symbol, signed in self._admitted:
+                units[symbol] = units.get(symbol, 0.0) + signed
+            self.open_units = units
+
+    def _refresh(self, batch) -> None:
+        self.rates.update(batch.closes)
+        if self.positions_fn is not None and (self._fetching is None or self._fetching.done()):
+            self._fetching = self._fetcher.submit(self._fetch_positions)
+
+    def scale_factors(self, symbols, units) -> np.ndarray:
+        """Vectorized per-order scale factors in [0, 1] for signed `units` of `symbols`."""
+        rates = self.rates
+        held = [s for s in self.open_units if s in rates.pair_index]
+        open_exp = currency_exposure(rates, held, [self.open_units[s] for s in held])
+
+        idx = np.array([rates.pair_index[s] for s in symbols], dtype=np.int64)
+        units = np.asarray(units, dtype=np.float64)
+        base, quote = rates.base[idx], rates.quote[idx]
+        contrib = np.stack([
+            np.nan_to_num(units * rates.value[base]),
+            np.nan_to_num(-units * np.exp(rates.log_price[idx]) * rates.value[quote]),
+        ])                                               # 2 × K: base leg, quote leg
+        legs = np.stack([base, quote])                   # currency of each leg
+        n = len(rates.currencies)
+        total = open_exp + np.bincount(legs.ravel(), contrib.ravel(), minlength=n)
+        direction = np.sign(total)
+
+        pushing = np.sign(contrib) == direction[legs]    # legs moving their currency further out
+        adding = np.bincount(legs[pushing], np.abs(contrib[pushing]), minlength=n)
+        reducing = total - direction * adding            # where the currency ends up without them
+        headroom = np.clip(self.limits - np.abs(reducing), 0.0, None)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = np.where((np.abs(total) > self.limits) & (adding > 0), np.clip(headroom / adding, 0.0, 1.0), 1.0)
+        leg_factor = np.where(pushing, factor[legs], 1.0)
+        return leg_factor.min(axis=0)
+
+    def __call__(self, batch):
+        with self._lock:
+            if not batch.late:
+                self._refresh(batch)
+            else:
+                self.rates.update(batch.closes)  # a straggler's close still moves the rates
+            intents = batch.intents
+            signed = [i.units if i.side == "buy" else -i.units for i in intents]
+            factors = self.scale_factors([i.symbol for i in intents], signed)
+        admitted = []
+        for intent, f in zip(intents, factors):
+            intent.units = int(intent.units * f)
+            if intent.units >= self.min_units:
+                admitted.append(intent)
+        if not batch.sent:
+            return admitted
+        with self._lock:
+            # count admitted orders as open until the next positions refresh
+            now = time.monotonic()
+            for intent in admitted:
+                signed_units = intent.units if intent.side == "buy" else -intent.units
+                self.open_units[intent.symbol] = self.open_units.get(intent.symbol, 0.0) + signed_units
+                self._admitted.append((now, intent.symbol, signed_units))
+        return admitted
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# 0️⃣ LRU cache with an entry and memory cap
+# -----------------------------
+class IndicatorCache:
+    """
+    Thread-safe LRU of computed indicator columns.
+
+    Keys identify the input window and the computation:
+    (instrument, granularity, first and last bar time, length, indicator, params). The
+    window start is part of the key because recursive indicators (ATR, RSI) depend on
+    where the window starts. Concurrent requests for the same key wait on a per-key
+    lock, so a value is computed once however many strategies ask at the same bar.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _store(self, key, entry) -> None:
+        self._entries[key] = entry
+        self.nbytes += entry[0].nbytes
+        while self._entries and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+            _, (values, _) = self._entries.popitem(last=False)
+            self.nbytes -= values.nbytes
+
+    def get_or_compute(self, key, compute):
+        """Return the cached (values, columns) for `key`, computing it with compute() at most once."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key)  # another thread computed it while we waited
+                if entry is not None:
+                    return entry
+            try:
+                result = compute()
+                if isinstance(result, pd.DataFrame):
+                    entry = (result.to_numpy(np.float64, copy=True), tuple(result.columns))
+                else:
+                    entry = (np.array(result, dtype=np.float64), None)
+                entry[0].flags.writeable = False
+                with self._lock:
+                    self.misses += 1
+                    self._store(key, entry)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)  # also when compute() raised: the next caller retries
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+indicator_cache = IndicatorCache()
+
+
+# -----------------------------
+# 1️⃣ Strategy-side helper
+# -----------------------------
+def cached_indicator(df: pd.DataFrame, name: str, params: tuple, compute, cache: IndicatorCache = None):
+    """
+    compute() through the shared cache when `df` says which bars it holds.
+
+    Frames from BarRingBuffer.frame() carry attrs['instrument'] / attrs['granularity'];
+    anything else (backtests, notebooks) is computed directly. Returns a Series (or a
+    DataFrame for multi-column indicators such as bbands) aligned with df.index.
+    """
+    instrument = df.attrs.get('instrument')
+    granularity = df.attrs.get('granularity')
+    if instrument is None or granularity is None or len(df) == 0:
+        return compute()
+    index = df.index
+    key = (instrument, granularity, index[0], index[-1], len(index), name, params)
+    values, columns = (cache or indicator_cache).get_or_compute(key, compute)
+    if columns is None:
+        return pd.Series(values, index=index, name=name)
+    return pd.DataFrame(values, index=index, columns=list(columns))
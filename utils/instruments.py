@@ -0,0 +1,115 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from oandapyV20.endpoints.accounts import AccountInstruments
+
+# -----------------------------
+# 0️⃣ Instrument metadata
+# -----------------------------
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "oanda_forex_scalping")
+CACHE_MAX_AGE = 24 * 3600  # instrument metadata changes rarely; refresh once a day
+
+
+@dataclass(frozen=True, slots=True)
+class InstrumentSpec:
+    """Immutable per-instrument metadata with its price/units formats precomputed."""
+    name: str
+    display_precision: int
+    pip_location: int
+    trade_units_precision: int
+    minimum_trade_size: float
+    margin_rate: float
+    price_format: str
+    units_format: str
+    instrument_type: str = "CURRENCY"   # CURRENCY / METAL / CFD: picks the trading session
+
+    @property
+    def pip_size(self) -> float:
+        return 10.0 ** self.pip_location
+
+    @property
+    def price_quantum(self) -> float:
+        return 10.0 ** -self.display_precision
+
+    @property
+    def base(self) -> str:
+        return self.name.split("_")[0]
+
+    @property
+    def quote(self) -> str:
+        return self.name.split("_")[1]
+
+    def format_price(self, price: float) -> str:
+        """Quantize a price to the instrument's display precision."""
+        return self.price_format % price
+
+    def format_units(self, units: float) -> str:
+        """Quantize units to the instrument's trade-units precision."""
+        return self.units_format % units
+
+    @classmethod
+    def from_oanda(cls, inst: dict) -> "InstrumentSpec":
+        precision = int(inst["displayPrecision"])
+        units_precision = int(inst.get("tradeUnitsPrecision", 0))
+        return cls(
+            name=inst["name"],
+            display_precision=precision,
+            pip_location=int(inst["pipLocation"]),
+            trade_units_precision=units_precision,
+            minimum_trade_size=float(inst.get("minimumTradeSize", 1)),
+            margin_rate=float(inst.get("marginRate", 0)),
+            price_format=f"%.{precision}f",
+            units_format=f"%.{units_precision}f",
+            instrument_type=inst.get("type", "CURRENCY"),
+        )
+
+
+def build_spec_table(raw_instruments) -> MappingProxyType:
+    """Build the read-only {name: InstrumentSpec} table from AccountInstruments output."""
+    return MappingProxyType({inst["name"]: InstrumentSpec.from_oanda(inst) for inst in raw_instruments})
+
+
+# -----------------------------
+# 1️⃣ Loading (with on-disk cache)
+# -----------------------------
+def _cache_path(account_id: str) -> str:
+    return os.path.join(CACHE_DIR, f"instruments_{account_id}.json")
+
+
+def _read_cache(path: str, max_age: float):
+    try:
+        if time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path: str, raw_instruments) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(raw_instruments, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # the cache is an optimization only
+
+
+def load_instrument_specs(api, account_id: str, max_age: float = CACHE_MAX_AGE) -> MappingProxyType:
+    """
+    Return the instrument spec table for an account.
+
+    The raw AccountInstruments response is cached on disk and shared by every bot
+    process on the host, so the round trip happens at most once per `max_age`.
+    """
+    path = _cache_path(account_id)
+    raw = _read_cache(path, max_age)
+    if raw is None:
+        r = AccountInstruments(accountID=account_id)
+        raw = api.request(r)["instruments"]
+        _write_cache(path, raw)
+    return build_spec_table(raw)
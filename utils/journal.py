@@ -0,0 +1,169 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import atexit
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# 0️⃣ Record layout
+# -----------------------------
+# One fixed-width record per symbol per bar. Indicators a strategy doesn't compute are NaN;
+# side is +1 buy / -1 sell / 0 no trade; order_id is empty when nothing was placed.
+RECORD_DTYPE = np.dtype([
+    ("bar_time", "<i8"),      # bar open time, ns since epoch (UTC)
+    ("logged", "<i8"),        # wall clock when the decision was journaled, ns
+    ("symbol", "S8"),
+    ("book", "S16"),
+    ("close", "<f8"),
+    ("atr", "<f8"),
+    ("rsi", "<f8"),
+    ("z_score", "<f8"),
+    ("vwap", "<f8"),
+    ("signal", "i1"),         # TotalSignal
+    ("side", "i1"),
+    ("units", "<i4"),
+    ("sl_price", "<f8"),
+    ("tp_price", "<f8"),
+    ("order_id", "S16"),
+])
+
+# record field → strategy column
+INDICATORS = {"close": "Close", "atr": "atr", "rsi": "RSI", "z_score": "Z_Score", "vwap": "VWAP"}
+
+MAGIC = b"OFSJRNL1"
+VERSION = 1
+
+
+def _header() -> bytes:
+    meta = json.dumps({"version": VERSION, "dtype": RECORD_DTYPE.descr}).encode()
+    # pad the header so the record block starts 8-byte aligned
+    size = len(MAGIC) + 4 + len(meta)
+    meta += b" " * (-size % 8)
+    return MAGIC + struct.pack("<I", len(meta)) + meta
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a decision journal")
+    (length,) = struct.unpack("<I", f.read(4))
+    meta = json.loads(f.read(length))
+    dtype = np.dtype([tuple(d) for d in meta["dtype"]])
+    return dtype, len(MAGIC) + 4 + length
+
+
+# -----------------------------
+# 1️⃣ Writer
+# -----------------------------
+class Journal:
+    """
+    Append-only binary journal of per-bar decisions.
+
+    record() only builds a tuple and queues it, so the bar loops never touch the disk.
+    A background thread drains the queue into a structured array, writes it as one
+    block and fsyncs at most every `fsync_interval` seconds. A crash can lose at most
+    that interval; a torn last record is ignored by the reader.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 1.0, max_batch: int = 4096):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.max_batch = max_batch
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fresh = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not fresh:
+            with open(path, "rb") as f:
+                dtype, offset = _read_header(f)
+            if dtype != RECORD_DTYPE:
+                raise ValueError(f"{path} was written with a different record layout")
+            # drop a torn trailing record before appending
+            whole = offset + (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+            os.truncate(path, whole)
+        self._file = open(path, "ab")
+        if fresh:
+            self._file.write(_header())
+        self._queue = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, symbol: str, book: str, bar_time, last=None, intent=None, order_id=None) -> None:
+        """Queue one decision: the strategy's last row, the (post-filter) OrderIntent, the order id."""
+        values = [np.nan] * len(INDICATORS)
+        signal = 0
+        if last is not None:
+            for k, col in enumerate(INDICATORS.values()):
+                if col in last.index:
+                    values[k] = float(last[col])
+            if 'TotalSignal' in last.index:
+                signal = int(last['TotalSignal'])
+        if intent is not None:
+            side = 1 if intent.side == "buy" else -1
+            units, sl, tp = int(intent.units), float(intent.sl_price), float(intent.tp_price)
+        else:
+            side, units, sl, tp = 0, 0, np.nan, np.nan
+        self._queue.put((pd.Timestamp(bar_time).value, time.time_ns(), symbol.encode(), book.encode(),
+                         *values, signal, side, units, sl, tp, (order_id or "").encode()))
+
+    def _drain(self) -> list:
+        rows = []
+        try:
+            while len(rows) < self.max_batch:
+                rows.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _run(self) -> None:
+        last_sync = time.monotonic()
+        dirty = False
+        while True:
+            stopping = self._stop.wait(0.05)
+            rows = self._drain()
+            while rows:
+                self._file.write(np.array(rows, dtype=RECORD_DTYPE).tobytes())
+                dirty = True
+                rows = self._drain()
+            if dirty and (stopping or time.monotonic() - last_sync >= self.fsync_interval):
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                last_sync = time.monotonic()
+                dirty = False
+            if stopping:
+                return
+
+    def close(self) -> None:
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+            self._file.close()
+
+
+# -----------------------------
+# 2️⃣ Reader
+# -----------------------------
+def read_journal(path: str) -> np.ndarray:
+    """Memory-map the journal's complete records as a structured array (no parsing)."""
+    with open(path, "rb") as f:
+        dtype, offset = _read_header(f)
+    count = (os.path.getsize(path) - offset) // dtype.itemsize
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+def journal_frame(path: str) -> pd.DataFrame:
+    """The journal as a DataFrame with decoded strings and UTC timestamps."""
+    records = read_journal(path)
+    df = pd.DataFrame({name: records[name] for name in records.dtype.names})
+    for col in ("bar_time", "logged"):
+        df[col] = pd.to_datetime(df[col], utc=True)
+    for col in ("symbol", "book", "order_id"):
+        df[col] = df[col].str.decode("ascii")
+    df["symbol"] = df["symbol"].astype("category")
+    df["book"] = df["book"].astype("category")
+    return df
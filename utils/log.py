@@ -0,0 +1,150 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+# -----------------------------
+# 0️⃣ Settings
+# -----------------------------
+# LOG_LEVEL         DEBUG / INFO / WARNING ... (default INFO)
+# LOG_SAMPLE_EVERY  keep 1 in N sampled (hot-path) records per key (default 1 = keep all)
+# LOG_QUEUE_SIZE    records buffered before new ones are dropped (default 100000)
+ROOT_LOGGER = "oanda"
+
+
+# -----------------------------
+# 1️⃣ JSON lines formatter
+# -----------------------------
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, then the record's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+# -----------------------------
+# 2️⃣ Non-blocking queue handler + sampling
+# -----------------------------
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread without formatting them in the caller.
+
+    The stock QueueHandler formats in prepare(), i.e. on the trading thread; here only
+    a traceback (if any) is rendered, and a full queue drops the record instead of
+    blocking the bar loop.
+    """
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in `every` records that carry a `sample_key`, counted per key; others pass."""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, "sample_key", None)
+        if key is None or self.every == 1:
+            return True
+        with self._lock:
+            n = self._counts.get(key, 0)
+            self._counts[key] = n + 1
+        return n % self.every == 0
+
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _setup() -> None:
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        root.propagate = False
+
+        q = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "100000")))
+        handler = NonBlockingQueueHandler(q)
+        handler.addFilter(SamplingFilter(int(os.getenv("LOG_SAMPLE_EVERY", "1"))))
+        root.addHandler(handler)
+
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter())
+        _listener = logging.handlers.QueueListener(q, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the shared queue-backed JSON pipeline (set up on first use)."""
+    _setup()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, sample: str = None,
+              exc_info=None, **fields) -> None:
+    """
+    Log a structured event. `fields` become top-level JSON keys; `sample` marks a
+    hot-path record to be sampled per key (e.g. the symbol) by LOG_SAMPLE_EVERY.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    extra = {"fields": fields}
+    if sample is not None:
+        extra["sample_key"] = f"{event}:{sample}"
+    logger.log(level, event, extra=extra, exc_info=exc_info)
+
+
+def bar_fields(last, columns) -> dict:
+    """Compact per-bar record: just the named columns of the strategy's last row, as floats."""
+    return {c: float(last[c]) for c in columns if c in last.index}
+
+
+def order_fields(response: dict) -> dict:
+    """Compact summary of an OrderCreate response (ids, fill price, or the cancel reason)."""
+    fields = {}
+    create = response.get("orderCreateTransaction", {})
+    fill = response.get("orderFillTransaction")
+    cancel = response.get("orderCancelTransaction")
+    if "id" in create:
+        fields["order_id"] = create["id"]
+    if fill:
+        fields["fill_price"] = fill.get("price")
+        fields["trade_id"] = fill.get("tradeOpened", {}).get("tradeID")
+    if cancel:
+        fields["cancel_reason"] = cancel.get("reason")
+    return fields
@@ -0,0 +1,53 @@
+import math
+from dataclasses import dataclass
+
+from utils.bars import GRANULARITY_SECONDS
+
+# -----------------------------
+# 0️⃣ Declared indicator lookbacks
+# -----------------------------
+SESSION_SECONDS = 24 * 3600   # pandas_ta's vwap anchors on the (UTC) day
+
+
+@dataclass(frozen=True, slots=True)
+class Lookback:
+    """
+    One indicator's history requirement, declared next to the strategy.
+
+    smoothing:
+      "window"  — exact once `period` bars are in (SMA, rolling std, Bollinger bands)
+      "wilder"  — recursive with α = 1/period (RSI, ATR): the seed never fully leaves
+      "ema"     — recursive with α = 2/(period + 1)
+      "session" — cumulative since the session anchor (VWAP): needs the whole session
+    `diff` counts the leading bars eaten by differencing (RSI's close.diff, ATR's prev close).
+    """
+    name: str
+    period: int
+    smoothing: str = "window"
+    diff: int = 0
+
+
+def warmup_bars(lookback: Lookback, tol: float = 1e-4, granularity: str = None) -> int:
+    """
+    Bars after which `lookback`'s last value no longer depends on where the history starts.
+
+    A recursive average weights the bar k steps back by (1-α)^k, so the start of the
+    window moves the output by at most that factor: k = ceil(ln tol / ln(1-α)) bars
+    past the seed period make it converge to relative tolerance `tol`.
+    """
+    if lookback.smoothing == "window":
+        return lookback.period + lookback.diff
+    if lookback.smoothing in ("wilder", "ema"):
+        alpha = 1.0 / lookback.period if lookback.smoothing == "wilder" else 2.0 / (lookback.period + 1)
+        k = math.ceil(math.log(tol) / math.log(1.0 - alpha))
+        return lookback.period + lookback.diff + k
+    if lookback.smoothing == "session":
+        if granularity is None:
+            raise ValueError(f"{lookback.name}: a session-anchored lookback needs the granularity")
+        return SESSION_SECONDS // GRANULARITY_SECONDS[granularity]
+    raise ValueError(f"{lookback.name}: unknown smoothing '{lookback.smoothing}'")
+
+
+def required_bars(lookbacks, tol: float = 1e-4, granularity: str = None) -> int:
+    """Complete bars a strategy must see for every declared indicator to be converged on the last bar."""
+    return max((warmup_bars(lb, tol, granularity) for lb in lookbacks), default=1)
@@ -0,0 +1,141 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+
+# -----------------------------
+# 0️⃣ Trading hours
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class TradingHours:
+    """
+    A weekly session in exchange-local time, e.g. Sunday 17:00 → Friday 17:00 New York.
+
+    Days are Python weekdays (Monday = 0 ... Sunday = 6). `daily_break` is an optional
+    (start, end) local-time window inside the week when the instrument does not trade.
+    """
+    open_day: int = 6
+    open_time: dtime = dtime(17, 0)
+    close_day: int = 4
+    close_time: dtime = dtime(17, 0)
+    tz: str = "America/New_York"
+    daily_break: tuple = None
+
+    def _minute_of_week(self, day: int, t: dtime) -> int:
+        return day * 1440 + t.hour * 60 + t.minute
+
+    def in_week(self, local: datetime) -> bool:
+        now = self._minute_of_week(local.weekday(), local.time())
+        start = self._minute_of_week(self.open_day, self.open_time)
+        end = self._minute_of_week(self.close_day, self.close_time)
+        if start < end:
+            return start <= now < end
+        return now >= start or now < end  # the session wraps over the week boundary
+
+    def in_break(self, local: datetime) -> bool:
+        if self.daily_break is None:
+            return False
+        start, end = self.daily_break
+        t = local.time()
+        return start <= t < end if start < end else (t >= start or t < end)
+
+    def next_week_open(self, local: datetime) -> datetime:
+        days = (self.open_day - local.weekday()) % 7
+        candidate = datetime.combine(local.date() + timedelta(days=days), self.open_time, local.tzinfo)
+        return candidate if candidate > local else candidate + timedelta(days=7)
+
+    def break_end(self, local: datetime) -> datetime:
+        end = datetime.combine(local.date(), self.daily_break[1], local.tzinfo)
+        return end if end > local else end + timedelta(days=1)
+
+
+FOREX_HOURS = TradingHours()
+# spot metals and CFDs stop for an hour at the New York rollover
+METAL_HOURS = TradingHours(daily_break=(dtime(17, 0), dtime(18, 0)))
+HOURS_BY_TYPE = {"CURRENCY": FOREX_HOURS, "METAL": METAL_HOURS, "CFD": METAL_HOURS}
+
+# (month, day): the market is shut from 17:00 New York the day before until 17:00 on the day
+HOLIDAYS = ((12, 25), (1, 1))
+
+
+# -----------------------------
+# 1️⃣ Calendar
+# -----------------------------
+class MarketCalendar:
+    """
+    Per-instrument open/closed lookups for the schedulers.
+
+    Each symbol trades on `default` hours unless `hours` overrides it (see
+    from_specs, which maps the instruments' OANDA type to its session). Holidays
+    close every instrument for the 24h ending at their session open time.
+    """
+
+    def __init__(self, hours: dict = None, default: TradingHours = FOREX_HOURS, holidays=HOLIDAYS):
+        self.hours = dict(hours or {})
+        self.default = default
+        self.holidays = tuple(holidays)
+
+    @classmethod
+    def from_specs(cls, specs, overrides: dict = None, holidays=HOLIDAYS) -> "MarketCalendar":
+        """Sessions from the instrument spec table (InstrumentSpec.instrument_type), then `overrides`."""
+        hours = {name: HOURS_BY_TYPE.get(spec.instrument_type, FOREX_HOURS) for name, spec in specs.items()}
+        hours.update(overrides or {})
+        return cls(hours, holidays=holidays)
+
+    def _hours(self, symbol: str) -> TradingHours:
+        return self.hours.get(symbol, self.default)
+
+    def _holiday_end(self, hours: TradingHours, local: datetime):
+        """End of the holiday closure `local` falls in, or None."""
+        for d in (local.date(), local.date() + timedelta(days=1)):
+            if (d.month, d.day) not in self.holidays:
+                continue
+            end = datetime.combine(d, hours.open_time, local.tzinfo)
+            if end - timedelta(days=1) <= local < end:
+                return end
+        return None
+
+    def is_open(self, symbol: str, when: datetime) -> bool:
+        hours = self._hours(symbol)
+        local = when.astimezone(ZoneInfo(hours.tz))
+        return hours.in_week(local) and not hours.in_break(local) and self._holiday_end(hours, local) is None
+
+    def next_open(self, symbol: str, when: datetime) -> datetime:
+        """`when` if the market is open then, else the moment it next opens (in `when`'s timezone)."""
+        hours = self._hours(symbol)
+        local = when.astimezone(ZoneInfo(hours.tz))
+        for _ in range(16):
+            if not hours.in_week(local):
+                local = hours.next_week_open(local)
+            elif hours.in_break(local):
+                local = hours.break_end(local)
+            elif (end := self._holiday_end(hours, local)) is not None:
+                local = end
+            else:
+                return local.astimezone(when.tzinfo)
+        raise ValueError(f"{symbol}: no trading session found after {when}")
+
+    def open_symbols(self, symbols, when: datetime) -> set:
+        return {s for s in symbols if self.is_open(s, when)}
+
+
+# -----------------------------
+# 2️⃣ Sleeping through closed sessions
+# -----------------------------
+def wait_for_open(calendar: MarketCalendar, symbol: str, now: datetime, warm=None, lead: float = 60.0) -> datetime:
+    """
+    Block until `symbol`'s market reopens; returns the reopen time.
+
+    `warm` (e.g. a buffer refresh) runs `lead` seconds before the open, so the
+    history and the HTTP session are ready for the first bar of the session.
+    """
+    reopen = calendar.next_open(symbol, now)
+    time.sleep(max(0.0, (reopen - now).total_seconds() - lead))
+    if warm is not None:
+        try:
+            warm()
+        except Exception:
+            pass  # the first bar of the session refreshes again anyway
+    time.sleep(max(0.0, (reopen - datetime.now(now.tzinfo)).total_seconds()))
+    return reopen
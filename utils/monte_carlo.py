@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# 0️⃣ Worker side
+# -----------------------------
+_pl = None
+
+
+def _init_worker(pl: np.ndarray) -> None:
+    global _pl
+    _pl = pl
+
+
+def _resample(rng, n_paths: int, horizon: int, method: str, block_size: int) -> np.ndarray:
+    """(n_paths × horizon) indices into the ledger: i.i.d. bootstrap or moving-block bootstrap."""
+    n = len(_pl)
+    if method == "bootstrap" or block_size <= 1:
+        return rng.integers(0, n, size=(n_paths, horizon))
+    block_size = min(block_size, n)
+    n_blocks = -(-horizon // block_size)
+    starts = rng.integers(0, n - block_size + 1, size=(n_paths, n_blocks))
+    idx = starts[:, :, None] + np.arange(block_size)
+    return idx.reshape(n_paths, -1)[:, :horizon]
+
+
+def _simulate_chunk(args):
+    n_paths, horizon, seed, method, block_size, initial_equity, ruin_equity, grid = args
+    rng = np.random.default_rng(seed)
+    equity = initial_equity + np.cumsum(_pl[_resample(rng, n_paths, horizon, method, block_size)], axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), initial_equity)
+    drawdown = peak - equity
+    ruined = equity <= ruin_equity
+    hit = ruined.any(axis=1)
+    time_to_ruin = np.where(hit, ruined.argmax(axis=1) + 1, -1)
+    return (
+        equity[:, -1].copy(),
+        drawdown.max(axis=1),
+        (drawdown / peak).max(axis=1),
+        time_to_ruin,
+        equity[:, grid].astype(np.float32),
+    )
+
+
+# -----------------------------
+# 1️⃣ Driver
+# -----------------------------
+@dataclass
+class MonteCarloResult:
+    final_equity: np.ndarray
+    max_drawdown: np.ndarray         # per path, in account currency
+    max_drawdown_pct: np.ndarray     # per path, fraction of the running peak
+    time_to_ruin: np.ndarray         # per path, trades until equity first hit the ruin level (-1: never)
+    bands: pd.DataFrame              # equity percentiles (columns) after each sampled trade count (index)
+
+    def summary(self, percentiles=(5, 50, 95)) -> dict:
+        ruined = self.time_to_ruin >= 0
+        out = {"paths": len(self.final_equity), "ruin_probability": float(ruined.mean())}
+        if ruined.any():
+            out["median_time_to_ruin"] = float(np.median(self.time_to_ruin[ruined]))
+        for p in percentiles:
+            out[f"final_equity_p{p}"] = float(np.percentile(self.final_equity, p))
+            out[f"max_drawdown_p{p}"] = float(np.percentile(self.max_drawdown, p))
+            out[f"max_drawdown_pct_p{p}"] = float(np.percentile(self.max_drawdown_pct, p))
+        return out
+
+
+def simulate_equity(net_pl, paths: int = 100_000, horizon: int = None, initial_equity: float = 10_000.0,
+                    ruin_fraction: float = 0.5, method: str = "block", block_size: int = 20,
+                    percentiles=(5, 25, 50, 75, 95), band_points: int = 100, chunk_elements: int = 4_000_000,
+                    processes: int = None, seed: int = None) -> MonteCarloResult:
+    """
+    Monte Carlo equity paths from per-trade P&L.
+
+    `net_pl` is the ledger's net_pl (realizedPL + financing, in close order), e.g.
+    analyze_closed_trades(raw)[0]['net_pl']. Each path draws `horizon` trades (default:
+    the ledger length) either i.i.d. ("bootstrap") or as consecutive blocks of
+    `block_size` trades ("block"), which keeps streaks and regime clustering. Ruin is
+    equity at or below ruin_fraction · initial_equity. Paths are simulated as
+    (chunk × horizon) arrays of about `chunk_elements` in a process pool; each chunk
+    has its own spawned seed, so results are reproducible for a given `seed`.
+    """
+    if isinstance(net_pl, pd.Series):
+        net_pl = net_pl.to_numpy()
+    pl = np.asarray(net_pl, dtype=np.float64)
+    pl = pl[~np.isnan(pl)]
+    if len(pl) == 0:
+        raise ValueError("net_pl is empty")
+    horizon = horizon or len(pl)
+    grid = np.unique(np.linspace(0, horizon - 1, min(band_points, horizon)).astype(np.int64))
+
+    chunk = max(1, min(paths, chunk_elements // horizon))
+    sizes = [min(chunk, paths - start) for start in range(0, paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    ruin_equity = ruin_fraction * initial_equity
+    jobs = [(n, horizon, s, method, block_size, initial_equity, ruin_equity, grid) for n, s in zip(sizes, seeds)]
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(pl,)) as pool:
+        results = list(pool.map(_simulate_chunk, jobs))
+
+    final, dd, dd_pct, ruin, curves = (np.concatenate(parts) for parts in zip(*results))
+    bands = pd.DataFrame(np.percentile(curves, percentiles, axis=0).T,
+                         index=pd.Index(grid + 1, name="trades"),
+                         columns=[f"p{p}" for p in percentiles])
+    return MonteCarloResult(final, dd, dd_pct, ruin, bands)
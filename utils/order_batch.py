@@ -0,0 +1,129 @@
+import threading
+from dataclasses import dataclass, field
+
+# -----------------------------
+# 0️⃣ One bar's worth of decisions across the universe
+# -----------------------------
+@dataclass
+class Batch:
+    """Everything the symbol threads submitted for one cycle (wake-up) of the bar loop."""
+    cycle: object
+    closes: dict = field(default_factory=dict)    # symbol → last complete close (None if unknown)
+    spreads: dict = field(default_factory=dict)   # symbol → ask - bid at that close (None if unknown)
+    intents: list = field(default_factory=list)   # OrderIntents proposed this cycle
+    late: bool = False                            # stragglers processed after the batch closed: stages
+                                                  # amend the cycle's per-bar state rather than advance it
+    admitted: list = field(default_factory=list)  # late batches: orders the cycle already let through
+    sent: bool = True                             # False (screen): admitted orders rest, not open yet
+
+
+class _Cycle:
+    __slots__ = ("batch", "arrived", "expected", "done", "results", "admitted")
+
+    def __init__(self, cycle, expected=frozenset()):
+        self.batch = Batch(cycle)
+        self.arrived = set()
+        self.expected = expected
+        self.done = threading.Event()
+        self.results = {}
+        self.admitted = []
+
+
+# -----------------------------
+# 1️⃣ Batcher
+# -----------------------------
+class OrderBatcher:
+    """
+    Rendezvous for the per-symbol threads before place_order.
+
+    Every thread submits its bar-close result (an OrderIntent or None, plus its last
+    close and spread) for the cycle it woke up for. When all symbols have reported, or
+    `deadline` seconds after a thread arrived, the batch goes through `stages` once,
+    each stage being a callable Batch → list of OrderIntents (it may drop or resize
+    orders). Each thread then gets back its own, possibly modified, intent.
+    Stragglers arriving after their batch ran are processed as a `late` batch of one,
+    which carries the orders admitted so far in its cycle so that the stages still
+    weigh it against them.
+    `active` (cycle → symbols) narrows who is waited for, e.g. the symbols whose market
+    was open during the bar; by default every symbol is expected each cycle. A caller
+    that already holds the whole cycle (the event-driven TradingBot) uses decide().
+    """
+
+    def __init__(self, symbols, stages=(), deadline: float = 1.0, active=None):
+        self.symbols = frozenset(symbols)
+        self.stages = list(stages)
+        self.deadline = deadline
+        self.active = active
+        self._cycles = {}
+        self._lock = threading.Lock()
+
+    def _run(self, state: _Cycle) -> None:
+        intents = state.batch.intents
+        for stage in self.stages:
+            # stages run even without intents: they update their per-bar state from the closes
+            intents = stage(state.batch)
+            state.batch.intents = intents
+        state.results = {i.symbol: i for i in intents}
+        state.admitted.extend(intents)
+        state.done.set()
+
+    def decide(self, cycle, closes, spreads, intents) -> list:
+        """Run a cycle whose results are all in hand (no rendezvous): the admitted intents."""
+        state = _Cycle(cycle)
+        state.batch.closes.update(closes)
+        state.batch.spreads.update(spreads)
+        state.batch.intents.extend(intents)
+        with self._lock:
+            self._run(state)
+        return state.batch.intents
+
+    def screen(self, intents, spreads=None) -> list:
+        """
+        Run orders that are not sent this cycle (resting entries) through the stages.
+
+        Each order is screened on its own, as a late batch (no per-bar state moves) whose
+        admitted orders are not counted as sent, so a symbol's two sides are each sized
+        and netted against the open positions.
+        """
+        admitted = []
+        for intent in intents:
+            batch = Batch(None, spreads=dict(spreads or {}), intents=[intent], late=True, sent=False)
+            for stage in self.stages:
+                batch.intents = stage(batch)
+            admitted.extend(batch.intents)
+        return admitted
+
+    def submit(self, symbol: str, cycle, intent=None, close=None, spread=None):
+        """Hand in this symbol's result for `cycle` and wait for the batch decision."""
+        with self._lock:
+            state = self._cycles.get(cycle)
+            if state is None:
+                # a new cycle started: forget the finished ones
+                self._cycles = {c: s for c, s in self._cycles.items() if not s.done.is_set()}
+                state = self._cycles[cycle] = _Cycle(cycle, self.symbols)
+                if self.active is not None:
+                    state.expected = self.symbols & frozenset(self.active(cycle))
+            if state.done.is_set():
+                late = _Cycle(cycle)
+                late.batch.late = True
+                late.batch.admitted = list(state.admitted)
+                late.batch.closes[symbol] = close
+                late.batch.spreads[symbol] = spread
+                if intent is not None:
+                    late.batch.intents.append(intent)
+                self._run(late)
+                state.admitted.extend(late.admitted)
+                return late.results.get(symbol)
+            state.batch.closes[symbol] = close
+            state.batch.spreads[symbol] = spread
+            if intent is not None:
+                state.batch.intents.append(intent)
+            state.arrived.add(symbol)
+            if state.arrived >= state.expected:
+                self._run(state)
+
+        if not state.done.wait(self.deadline):
+            with self._lock:
+                if not state.done.is_set():
+                    self._run(state)
+        return state.results.get(symbol)
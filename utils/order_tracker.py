@@ -0,0 +1,354 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from oandapyV20.endpoints import orders
+from oandapyV20.endpoints.transactions import TransactionsSinceID, TransactionsStream
+from oandapyV20.exceptions import V20Error
+
+from utils.api_client import CircuitOpenError, is_outage
+from utils.log import get_logger, log_event
+
+log = get_logger("orders")
+
+# -----------------------------
+# 0️⃣ Client order ids
+# -----------------------------
+def client_order_id(tag: str, symbol: str, bar_time) -> str:
+    """
+    Compact id for the order a strategy sends on one bar, e.g. "mr.EURUSD.sm3a8c".
+
+    tag (2 chars) + instrument + the bar's epoch seconds in base 36: 16 chars, so it
+    also fits the journal's order_id field. It is deterministic, so a resend of the
+    same decision carries the same id and OANDA can tell us whether it already exists.
+    """
+    seconds = pd.Timestamp(bar_time).value // 10**9
+    return f"{tag}.{symbol.replace('_', '')}.{np.base_repr(seconds, 36).lower()}"
+
+
+# -----------------------------
+# 1️⃣ Pending-order table
+# -----------------------------
+FINAL_STATES = frozenset({"filled", "rejected", "cancelled", "failed"})
+# cancels that are the order's normal end (a resting entry moved, expired or withdrawn), logged at INFO
+ROUTINE_CANCELS = frozenset({"CLIENT_REQUEST", "CLIENT_REQUEST_REPLACED", "TIME_IN_FORCE_EXPIRED"})
+
+
+@dataclass(slots=True)
+class TrackedOrder:
+    client_id: str
+    symbol: str
+    side: str
+    units: float
+    sent: float                 # time.monotonic() at submit
+    state: str = "sent"         # sent → accepted → filled, or rejected / cancelled / failed;
+                                # "unknown": retries ran out unsure whether OANDA has it
+    order_id: str = None
+    ack_ms: float = None        # submit → first transaction for this order
+    ack_source: str = None      # "stream", "rest" or "lookup", whichever reported first
+    fill_ms: float = None
+    fill_price: str = None
+    trade_id: str = None
+    reason: str = None
+    checked: float = None       # time.monotonic() of the last OrderDetails lookup by the sweep
+
+
+class OrderTracker:
+    """
+    Fire-and-track order submission.
+
+    submit() stamps the order with a clientExtensions id, queues the OrderCreate on a
+    small thread pool and returns at once. A TransactionsStream consumer matches the
+    account's transactions (create, fill, reject, cancel) to the pending table by
+    client id; the REST response is matched too, so whichever arrives first sets the
+    ack latency. Finished orders are logged as "order_ack" and kept in `done`; every
+    state change is also passed to each of `listeners` (called on the tracker's threads).
+
+    After a reconnect the stream is caught up from the last transaction id it saw
+    (TransactionsSinceID), so fills sent during the gap are not lost. Orders still
+    unfinished `expire_after` seconds after submit are looked up by client id and
+    settled from OANDA's answer (a 404 means the order never got there).
+
+    Transient failures (timeouts, connection errors, 429/5xx, open circuit) are retried
+    fast for up to `retry_for` seconds after the first failure. Since the lost request
+    may have reached OANDA, the order is first looked up by its client id
+    (OrderDetails "@id") and only resent if OANDA has never seen it, so a retry cannot
+    open a second position. When the retries run out it is looked up once more; if
+    even that fails the order stays pending as "unknown" for the stream or the expiry
+    sweep to settle.
+    """
+
+    def __init__(self, api, account_id: str, workers: int = 4, stream_api=None, keep: int = 10_000,
+                 retry_for: float = 10.0, first_delay: float = 0.05, max_delay: float = 1.0,
+                 expire_after: float = 60.0):
+        self.api = api
+        self.expire_after = expire_after
+        self.last_id = None         # id of the last transaction seen on the stream
+        self.retry_for = retry_for
+        self.first_delay = first_delay
+        self.max_delay = max_delay
+        self.stream_api = stream_api or api
+        self.account_id = account_id
+        self.pending = {}
+        self._sending = set()       # client ids whose OrderCreate (or its retries) is still running
+        self.done = deque(maxlen=keep)
+        self.listeners = []         # fn(TrackedOrder) per state change
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orders")
+        self._stop = threading.Event()
+        self._thread = None
+        self._sweeper = None
+
+    # -----------------------------
+    # Submission
+    # -----------------------------
+    def submit(self, data: dict, client_id: str) -> TrackedOrder:
+        """Send an OrderCreate body without waiting for the response."""
+        order = data["order"]
+        order["clientExtensions"] = {**order.get("clientExtensions", {}), "id": client_id}
+        units = float(order["units"])
+        tracked = TrackedOrder(client_id, order["instrument"], "buy" if units > 0 else "sell", abs(units),
+                               time.monotonic())
+        with self._lock:
+            self.pending[client_id] = tracked
+            self._sending.add(client_id)
+        self._pool.submit(self._send, client_id, data)
+        return tracked
+
+    def watch(self, client_id: str, symbol: str, side: str, units: float) -> TrackedOrder:
+        """Track an order sent elsewhere (e.g. a resting entry) under its clientExtensions id."""
+        tracked = TrackedOrder(client_id, symbol, side, abs(units), time.monotonic())
+        with self._lock:
+            self.pending[client_id] = tracked
+        return tracked
+
+    def get(self, client_id: str):
+        """The TrackedOrder for `client_id`, pending or recently finished (None if unknown)."""
+        with self._lock:
+            order = self.pending.get(client_id)
+            if order is None:
+                order = next((o for o in reversed(self.done) if o.client_id == client_id), None)
+        return order
+
+    def _send(self, client_id: str, data: dict) -> None:
+        try:
+            self._send_order(client_id, data)
+        finally:
+            with self._lock:
+                self._sending.discard(client_id)
+
+    def _send_order(self, client_id: str, data: dict) -> None:
+        deadline = None  # set at the first failure: a timed-out attempt alone can take retry_for
+        delay = self.first_delay
+        unsure = False   # a previous attempt may have reached OANDA
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if unsure:
+                    existing = self._lookup(client_id)
+                    if existing is not None:
+                        self._adopt(client_id, existing)
+                        return
+                    unsure = False  # OANDA has never seen this id: resending is safe
+                response = self.api.request(orders.OrderCreate(accountID=self.account_id, data=data))
+                break
+            except Exception as e:
+                transient = isinstance(e, CircuitOpenError) or is_outage(e)
+                if isinstance(e, V20Error) and "CLIENT_ORDER_ID_ALREADY_EXISTS" in str(e):
+                    transient = unsure = True  # an earlier attempt got through: adopt it
+                if not transient:
+                    self._update(client_id, "rejected" if isinstance(e, V20Error) else "failed", "rest",
+                                 reason=str(e))
+                    return
+                unsure = unsure or not isinstance(e, CircuitOpenError)  # an open circuit sent nothing
+                if deadline is None:
+                    deadline = time.monotonic() + self.retry_for
+                if time.monotonic() + delay > deadline:
+                    self._give_up(client_id, unsure, f"gave up after {attempt} attempts: {e}")
+                    return
+                log_event(log, "order_retry", level=logging.WARNING, client_id=client_id, attempt=attempt,
+                          retry_ms=round(delay * 1e3), error=str(e))
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_delay)
+        for key in ("orderCreateTransaction", "orderRejectTransaction", "orderFillTransaction",
+                    "orderCancelTransaction"):
+            if key in response:
+                self.on_transaction(response[key], source="rest", client_id=client_id)
+
+    def _give_up(self, client_id: str, unsure: bool, reason: str) -> None:
+        if not unsure:
+            self._update(client_id, "failed", "rest", reason=reason)
+            return
+        try:
+            existing = self._lookup(client_id)
+        except Exception as e:
+            # OANDA may hold the order: keep it pending so a fill on the stream still lands
+            self._update(client_id, "unknown", "rest", reason=f"{reason}; lookup failed: {e}")
+            log_event(log, "order_unknown", level=logging.WARNING, client_id=client_id, reason=reason, error=str(e))
+            return
+        if existing is None:
+            self._update(client_id, "failed", "lookup", reason=reason)
+        else:
+            self._adopt(client_id, existing)
+
+    def _lookup(self, client_id: str):
+        """The order OANDA holds under this client id, or None if there is none (404)."""
+        try:
+            return self.api.request(orders.OrderDetails(accountID=self.account_id, orderID=f"@{client_id}"))["order"]
+        except V20Error as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def _adopt(self, client_id: str, order: dict) -> None:
+        """Track an order an earlier attempt created instead of sending it again."""
+        state = order.get("state")
+        if state == "FILLED":
+            self._update(client_id, "filled", "lookup", order_id=order.get("id"), trade_id=order.get("tradeOpenedID"))
+        elif state == "CANCELLED":
+            self._update(client_id, "cancelled", "lookup", order_id=order.get("id"), reason=order.get("cancelReason"))
+        else:
+            self._update(client_id, "accepted", "lookup", order_id=order.get("id"))
+
+    # -----------------------------
+    # Matching
+    # -----------------------------
+    def on_transaction(self, tx: dict, source: str = "stream", client_id: str = None) -> None:
+        kind = tx.get("type", "")
+        client_id = client_id or tx.get("clientOrderID") or tx.get("clientExtensions", {}).get("id")
+        if client_id is None:
+            return
+        if kind == "ORDER_FILL":
+            self._update(client_id, "filled", source, order_id=tx.get("orderID"), fill_price=tx.get("price"),
+                         trade_id=tx.get("tradeOpened", {}).get("tradeID"))
+        elif kind == "ORDER_CANCEL":
+            self._update(client_id, "cancelled", source, order_id=tx.get("orderID"), reason=tx.get("reason"))
+        elif kind.endswith("_ORDER_REJECT"):
+            self._update(client_id, "rejected", source, reason=tx.get("rejectReason"))
+        elif kind.endswith("_ORDER"):
+            self._update(client_id, "accepted", source, order_id=tx.get("id"))
+
+    def _update(self, client_id: str, state: str, source: str, **fields) -> None:
+        with self._lock:
+            order = self.pending.get(client_id)
+            if order is None or order.state in FINAL_STATES:
+                return
+            before = order.state
+            elapsed = (time.monotonic() - order.sent) * 1e3
+            if order.ack_ms is None and state != "unknown":
+                order.ack_ms, order.ack_source = round(elapsed, 2), source
+            if state == "filled":
+                order.fill_ms = round(elapsed, 2)
+            if state not in ("accepted", "unknown") or order.state in ("sent", "unknown"):
+                order.state = state
+            for k, v in fields.items():
+                if v is not None:
+                    setattr(order, k, v)
+            if order.state in FINAL_STATES:
+                del self.pending[client_id]
+                self.done.append(order)
+            self._changed.notify_all()
+        if order.state != before:
+            for listener in self.listeners:
+                listener(order)
+        if order.state in FINAL_STATES:
+            routine = order.state == "filled" or (order.state == "cancelled" and order.reason in ROUTINE_CANCELS)
+            log_event(log, "order_ack", level=logging.INFO if routine else logging.WARNING,
+                      client_id=client_id, symbol=order.symbol, side=order.side, units=order.units,
+                      state=order.state, order_id=order.order_id, ack_ms=order.ack_ms,
+                      ack_source=order.ack_source, fill_ms=order.fill_ms, fill_price=order.fill_price,
+                      trade_id=order.trade_id, reason=order.reason)
+
+    def wait(self, client_id: str, timeout: float = None):
+        """Block until `client_id` is finished; returns its TrackedOrder (None on timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while client_id in self.pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+        return next((o for o in reversed(self.done) if o.client_id == client_id), None)
+
+    # -----------------------------
+    # Transaction stream
+    # -----------------------------
+    def _seen(self, tx_id) -> None:
+        if tx_id is not None and (self.last_id is None or int(tx_id) > int(self.last_id)):
+            self.last_id = str(tx_id)
+
+    def _catch_up(self, since: str) -> int:
+        """Replay the transactions after `since` that the stream missed while it was down."""
+        r = TransactionsSinceID(accountID=self.account_id, params={"id": since})
+        response = self.api.request(r)
+        for tx in response.get("transactions", []):
+            self.on_transaction(tx)
+            self._seen(tx.get("id"))
+        self._seen(response.get("lastTransactionID"))
+        return len(response.get("transactions", []))
+
+    def _stream(self) -> None:
+        delay = 1.0
+        while not self._stop.is_set():
+            since = self.last_id
+            try:
+                r = TransactionsStream(accountID=self.account_id)
+                for tx in self.stream_api.request(r):
+                    delay = 1.0
+                    if self._stop.is_set():
+                        return
+                    if since is not None:
+                        # connected again: replay the gap (duplicates with the stream are harmless)
+                        log_event(log, "stream_caught_up", since=since, replayed=self._catch_up(since))
+                        since = None
+                    if tx.get("type") == "HEARTBEAT":
+                        self._seen(tx.get("lastTransactionID"))
+                    else:
+                        self.on_transaction(tx)
+                        self._seen(tx.get("id"))
+            except Exception as e:
+                log_event(log, "stream_error", level=logging.ERROR, error=str(e), retry_s=delay)
+            self._stop.wait(delay)
+            delay = min(delay * 2, 30.0)
+
+    def expire(self) -> int:
+        """Look up orders unfinished for `expire_after` seconds and settle them; returns how many were checked."""
+        now = time.monotonic()
+        with self._lock:
+            # orders still being sent are left to _send: a lookup could race their OrderCreate
+            stale = [o.client_id for o in self.pending.values()
+                     if o.client_id not in self._sending and now - o.sent >= self.expire_after
+                     and (o.checked is None or now - o.checked >= self.expire_after)]
+            for client_id in stale:
+                self.pending[client_id].checked = now
+        for client_id in stale:
+            try:
+                existing = self._lookup(client_id)
+            except Exception as e:
+                log_event(log, "order_lookup_error", level=logging.WARNING, client_id=client_id, error=str(e))
+                continue
+            if existing is None:
+                self._update(client_id, "failed", "lookup", reason="unknown to OANDA")
+            else:
+                self._adopt(client_id, existing)
+        return len(stale)
+
+    def _sweep(self) -> None:
+        while not self._stop.wait(self.expire_after / 4):
+            self.expire()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._stream, name="transactions", daemon=True)
+        self._thread.start()
+        self._sweeper = threading.Thread(target=self._sweep, name="orders-expiry", daemon=True)
+        self._sweeper.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,203 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+from strategies.mean_reversion_scalping import mean_reversion_scalping
+from utils.bars import build_bars, granularity_ns, time_ns
+from utils.lookback import Lookback, required_bars
+from utils.signals import prepare_candles, evaluate_bar
+
+# -----------------------------
+# 0️⃣ Fill model & results
+# -----------------------------
+@dataclass(frozen=True)
+class FillModel:
+    """How the simulated broker fills: order arrival latency after bar close, and adverse slippage."""
+    latency: float = 0.25       # seconds from bar close until the MARKET order reaches OANDA
+    slippage: float = 0.0       # price units added against us on market fills and stop-outs
+
+
+@dataclass
+class ReplayResult:
+    symbol: str
+    decisions: pd.DataFrame = field(repr=False)
+    trades: pd.DataFrame = field(repr=False)
+
+
+def load_quotes(path: str) -> pd.DataFrame:
+    """Load stored ticks (time, bid, ask) or S5 candles (candles_to_df layout) from CSV or Parquet."""
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+# -----------------------------
+# 1️⃣ Simulated broker
+# -----------------------------
+class SimBroker:
+    """
+    Fills MARKET orders with SL/TP on the stored quote path.
+
+    Works on ticks or S5 candles. SL/TP are resolved in time order on the quote path,
+    so the intrabar ordering an M5 backtest cannot see is respected. When a single S5
+    candle touches both levels, the stop is assumed to have been hit first.
+    """
+    SEARCH_CHUNK = 4096
+
+    def __init__(self, quotes: pd.DataFrame, fill_model: FillModel = FillModel(), spec=None):
+        q = quotes
+        if 'bid' in q:  # ticks
+            bid = q['bid'].to_numpy(np.float64)
+            ask = q['ask'].to_numpy(np.float64)
+            self.bid_o = self.bid_h = self.bid_l = bid
+            self.ask_o = self.ask_h = self.ask_l = ask
+        else:
+            self.bid_o, self.bid_h, self.bid_l = (q[c].to_numpy(np.float64) for c in ('bid_o', 'bid_h', 'bid_l'))
+            self.ask_o, self.ask_h, self.ask_l = (q[c].to_numpy(np.float64) for c in ('ask_o', 'ask_h', 'ask_l'))
+        self.t = time_ns(q['time'])
+        self.fill_model = fill_model
+        self.spec = spec
+
+    def _round(self, price: float) -> float:
+        # OANDA receives the formatted price, so the simulation uses it too
+        return float(self.spec.format_price(price)) if self.spec is not None else price
+
+    def _first(self, hit, start: int) -> int:
+        """Index of the first True of hit(i, j) at or after start, scanning in growing chunks."""
+        n = len(self.t)
+        size = self.SEARCH_CHUNK
+        i = start
+        while i < n:
+            j = min(n, i + size)
+            idx = np.flatnonzero(hit(i, j))
+            if len(idx):
+                return i + int(idx[0])
+            i, size = j, size * 2
+        return -1
+
+    def submit(self, intent, arrival_ns: int):
+        """Fill `intent` at the first quote at/after arrival and run it to SL, TP or end of data."""
+        entry = int(np.searchsorted(self.t, arrival_ns, side='left'))
+        if entry >= len(self.t):
+            return None
+        slip = self.fill_model.slippage
+        sl, tp = self._round(intent.sl_price), self._round(intent.tp_price)
+        if intent.side == "buy":
+            open_price = self.ask_o[entry] + slip
+            sl_hit = lambda i, j: self.bid_l[i:j] <= sl
+            tp_hit = lambda i, j: self.bid_h[i:j] >= tp
+        else:
+            open_price = self.bid_o[entry] - slip
+            sl_hit = lambda i, j: self.ask_h[i:j] >= sl
+            tp_hit = lambda i, j: self.ask_l[i:j] <= tp
+
+        j_sl = self._first(sl_hit, entry)
+        j_tp = self._first(tp_hit, entry)
+        if j_sl < 0 and j_tp < 0:
+            exit_idx, reason, close_price = len(self.t) - 1, "OPEN", np.nan
+        elif j_tp < 0 or (0 <= j_sl <= j_tp):
+            exit_idx, reason = j_sl, "SL"
+            # a stop gapped through fills at the first available price, not the stop
+            if intent.side == "buy":
+                close_price = min(sl, self.bid_o[j_sl]) - slip
+            else:
+                close_price = max(sl, self.ask_o[j_sl]) + slip
+        else:
+            exit_idx, reason, close_price = j_tp, "TP", tp
+
+        direction = 1 if intent.side == "buy" else -1
+        return {
+            "instrument": intent.symbol,
+            "side": intent.side.upper(),
+            "units": intent.units * direction,
+            "signal_time": intent.time,
+            "openTime": pd.Timestamp(self.t[entry], tz="UTC"),
+            "open_price": open_price,
+            "sl_price": sl,
+            "tp_price": tp,
+            "closeTime": pd.Timestamp(self.t[exit_idx], tz="UTC") if reason != "OPEN" else pd.NaT,
+            "close_price": close_price,
+            "exit_reason": reason,
+            "pl_quote": (close_price - open_price) * intent.units * direction,
+        }
+
+
+# -----------------------------
+# 2️⃣ Replay
+# -----------------------------
+def replay_symbol(symbol: str, quotes: pd.DataFrame, strategy=mean_reversion_scalping,
+                  granularity: str = 'M5', count: int = None, backcandles: int = 15, units: int = 1000,
+                  ATR_multiplier_SL: float = 1.0, ATR_multiplier_TP: float = 1.5,
+                  fill_model: FillModel = FillModel(), spec=None) -> ReplayResult:
+    """
+    Replay one symbol's stored ticks/S5 candles through the live decision path.
+
+    Bars come from build_bars → prepare_candles, and each bar close is evaluated by
+    evaluate_bar on the window run_symbol keeps: by default the complete bars the
+    strategy's declared lookbacks need (required_bars, as in main.py); with `count`,
+    `count` candles requested and the forming one dropped. So signals match
+    run_symbol bar for bar. Position sizing and the batch stages (spread gate,
+    fixed-fractional sizing, correlation, exposure netting) are not modelled: every
+    signal is sent as `units` to a SimBroker instead of OrderCreate.
+    """
+    quotes = quotes.sort_values('time', kind='stable').reset_index(drop=True)
+    bars = prepare_candles(build_bars(quotes, granularity, now=quotes['time'].iloc[-1]))
+    broker = SimBroker(quotes, fill_model, spec)
+    step = granularity_ns(granularity)
+    latency = int(fill_model.latency * 1e9)
+    if count is None:
+        lookbacks = getattr(strategy, 'lookbacks', ()) + (Lookback('backcandles', backcandles),)
+        window = required_bars(lookbacks, granularity=granularity)
+    else:
+        window = count - 1  # the incomplete bar is dropped from the `count` fetched
+
+    decisions, trades = [], []
+    for k in range(backcandles - 1, len(bars)):
+        df = bars.iloc[max(0, k - window + 1):k + 1].copy()
+        last, intent = evaluate_bar(symbol, df, strategy, backcandles, units,
+                                    ATR_multiplier_SL, ATR_multiplier_TP)
+        decisions.append((last.name, int(last['TotalSignal']), last['Close'], last['atr'],
+                          intent.side if intent is not None else None))
+        if intent is not None:
+            closed_at = intent.time.value + step
+            fill = broker.submit(intent, closed_at + latency)
+            if fill is not None:
+                trades.append(fill)
+
+    decisions = pd.DataFrame(decisions, columns=['time', 'TotalSignal', 'Close', 'atr', 'side'])
+    return ReplayResult(symbol, decisions.set_index('time'), pd.DataFrame(trades))
+
+
+def _replay_file(symbol: str, path: str, kwargs: dict) -> ReplayResult:
+    return replay_symbol(symbol, load_quotes(path), **kwargs)
+
+
+def replay_universe(paths: dict, processes: int = None, specs=None, **kwargs) -> dict:
+    """
+    Replay many symbols in parallel, one worker process per symbol file.
+
+    `paths` maps symbol → stored tick/S5 file; each worker loads its own file so no
+    large arrays cross process boundaries. Returns {symbol: ReplayResult}.
+    """
+    specs = dict(specs or {})
+    results = {}
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {
+            sym: pool.submit(_replay_file, sym, path, {**kwargs, "spec": specs.get(sym)})
+            for sym, path in paths.items()
+        }
+        for sym, fut in futures.items():
+            results[sym] = fut.result()
+    return results
+
+
+if __name__ == "__main__":
+    # python -m utils.replay all_Data/EUR_USD_S5.csv all_Data/USD_JPY_S5.csv ...
+    files = sys.argv[1:]
+    paths = {"_".join(os.path.basename(f).split("_")[:2]): f for f in files}
+    for sym, res in replay_universe(paths).items():
+        t = res.trades
+        pl = t['pl_quote'].sum() if len(t) else 0.0
+        print(f"{sym}: {len(res.decisions)} bars, {len(t)} trades, P&L (quote ccy) {pl:.2f}")
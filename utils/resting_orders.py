@@ -0,0 +1,275 @@
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import pandas as pd
+from oandapyV20.endpoints import orders
+from oandapyV20.exceptions import V20Error
+
+from utils.log import get_logger, log_event
+from utils.order_tracker import FINAL_STATES, client_order_id
+from utils.signals import SIGNAL_SIDES, OrderIntent
+
+log = get_logger("resting")
+RESTING_TAG = "resting_entry"   # clientExtensions tag: marks the orders this module owns
+CLIENT_TAGS = {"buy": "rb", "sell": "rs"}   # client_order_id tag per side
+
+# -----------------------------
+# 0️⃣ Entry orders at the trigger prices
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class EntryOrder:
+    """One resting entry, with every price already formatted to the instrument's precision."""
+    symbol: str
+    side: str
+    type: str          # "STOP" or "LIMIT"
+    units: str
+    price: str
+    sl_price: str
+    tp_price: str
+    intent: OrderIntent = field(default=None, compare=False, repr=False)   # what it trades, unformatted
+
+    @property
+    def key(self) -> tuple:
+        return self.symbol, self.side
+
+    def data(self, gtd: datetime, client_id: str) -> dict:
+        return {"order": {
+            "type": self.type,
+            "instrument": self.symbol,
+            "units": self.units if self.side == "buy" else f"-{self.units}",
+            "price": self.price,
+            "timeInForce": "GTD",
+            "gtdTime": gtd.strftime("%Y-%m-%dT%H:%M:%S.000000000Z"),
+            "positionFill": "DEFAULT",
+            "triggerCondition": "DEFAULT",
+            "stopLossOnFill": {"price": self.sl_price},
+            "takeProfitOnFill": {"price": self.tp_price},
+            "clientExtensions": {"id": client_id, "tag": RESTING_TAG},
+        }}
+
+
+def entry_type(side: str, price: float, market: float) -> str:
+    """A buy above the market (or a sell below it) waits for a breakout: STOP; the other way round: LIMIT."""
+    return "STOP" if (price > market) == (side == "buy") else "LIMIT"
+
+
+def trigger_intents(triggers, symbol: str, units: float, ATR_multiplier_SL: float, ATR_multiplier_TP: float,
+                    bar_time: pd.Timestamp) -> list:
+    """
+    The orders that trade ZScoreTriggers' levels the way the bar-close rule does.
+
+    A close below `long` is TotalSignal 1, above `short` TotalSignal 2; each becomes an
+    OrderIntent for SIGNAL_SIDES' side priced at its level, SL/TP at the armed ATR
+    multiples from the entry, so the batch stages can size and net it like a market order.
+    """
+    out = []
+    for signal, level in ((1, triggers.long), (2, triggers.short)):
+        side = SIGNAL_SIDES.get(signal)
+        if side is None or level is None or not math.isfinite(level) or level <= 0:
+            continue
+        sl_distance = ATR_multiplier_SL * triggers.atr
+        tp_distance = ATR_multiplier_TP * triggers.atr
+        if side == "buy":
+            sl_price, tp_price = level - sl_distance, level + tp_distance
+        else:
+            sl_price, tp_price = level + sl_distance, level - tp_distance
+        out.append(OrderIntent(symbol, side, units, level, sl_price, tp_price, bar_time, signal))
+    return out
+
+
+def entry_order(intent: OrderIntent, spec, market: float) -> EntryOrder:
+    """`intent` as a resting entry, every price formatted to the instrument's precision."""
+    return EntryOrder(spec.name, intent.side, entry_type(intent.side, intent.price, market),
+                      spec.format_units(intent.units), spec.format_price(intent.price),
+                      spec.format_price(intent.sl_price), spec.format_price(intent.tp_price), intent)
+
+
+# -----------------------------
+# 1️⃣ Cancel / replace manager
+# -----------------------------
+@dataclass(slots=True)
+class _Live:
+    order_id: str
+    client_id: str
+    order: EntryOrder      # None: adopted from OANDA's pending list, replaced on the next diff
+    expires: datetime
+
+
+class RestingOrderBook:
+    """
+    Keeps each symbol's resting entry orders equal to the desired set, with few requests.
+
+    sync() diffs the desired orders against the live ones: an order whose formatted
+    price, SL, TP and units are unchanged is left alone (unless it would expire within
+    the bar); a changed one is replaced in place (OrderReplace: one atomic cancel +
+    create); new ones are created and unwanted ones cancelled. Requests for all
+    symbols share one thread pool. Orders are GTD `expiry` after the close of the bar
+    they were computed for: more than a bar lets unchanged orders ride into the next
+    one, and a stopped bot leaves nothing resting for long.
+
+    Every order carries a client id (side tag + symbol + bar) and is registered with
+    `tracker`, so its fill is matched from the transaction stream like a market
+    order's; an order the tracker has seen fill or cancel counts as gone. A failed
+    request (other than a 404, which means the order is gone) leaves the table as it
+    was, since OANDA may or may not have acted on it. Before creating orders, and
+    after any such failure, the symbol's table is reconciled with OANDA's pending
+    orders carrying RESTING_TAG: one per side is adopted and any extras are cancelled. With
+    `positions` (→ net open units per instrument) open_sides() tells which sides
+    already hold a position, so the caller does not arm them again.
+    """
+
+    def __init__(self, api, account_id: str, workers: int = 8, expiry: timedelta = timedelta(minutes=6),
+                 tracker=None, positions=None):
+        self.api = api
+        self.account_id = account_id
+        self.expiry = expiry
+        self.tracker = tracker
+        self.positions = positions
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resting")
+        self._live = {}
+        self._unsure = set()    # symbols whose last sync had a request fail
+        self._lock = threading.Lock()
+
+    def _track(self, client_id: str, response: dict, replaced: _Live = None) -> str:
+        if self.tracker is not None:
+            self.tracker.on_transaction(response["orderCreateTransaction"], source="rest", client_id=client_id)
+            if replaced is not None and "orderCancelTransaction" in response:
+                self.tracker.on_transaction(response["orderCancelTransaction"], source="rest",
+                                            client_id=replaced.client_id)
+        return response["orderCreateTransaction"]["id"]
+
+    def _create(self, order: EntryOrder, gtd: datetime, client_id: str):
+        if self.tracker is not None:
+            self.tracker.watch(client_id, order.symbol, order.side, float(order.units))
+        r = orders.OrderCreate(accountID=self.account_id, data=order.data(gtd, client_id))
+        return self._track(client_id, self.api.request(r))
+
+    def _replace(self, live: _Live, order: EntryOrder, gtd: datetime, client_id: str):
+        if self.tracker is not None:
+            self.tracker.watch(client_id, order.symbol, order.side, float(order.units))
+        r = orders.OrderReplace(accountID=self.account_id, orderID=live.order_id, data=order.data(gtd, client_id))
+        try:
+            return self._track(client_id, self.api.request(r), replaced=live)
+        except V20Error as e:
+            if e.code != 404:
+                raise
+            return self._create(order, gtd, client_id)  # filled or expired meanwhile: nothing to replace
+
+    def _cancel(self, live: _Live):
+        try:
+            self.api.request(orders.OrderCancel(accountID=self.account_id, orderID=live.order_id))
+        except V20Error as e:
+            if e.code != 404:
+                raise
+        return None
+
+    def _state(self, live: _Live):
+        tracked = self.tracker.get(live.client_id) if self.tracker is not None else None
+        return tracked.state if tracked is not None else None
+
+    def open_sides(self, symbol: str) -> set:
+        """Sides of `symbol` with an open position (empty without `positions`)."""
+        if self.positions is None:
+            return set()
+        units = self.positions().get(symbol, 0.0)
+        return {"buy"} if units > 0 else {"sell"} if units < 0 else set()
+
+    def filled(self, symbol: str) -> list:
+        """(client id, OrderIntent) of `symbol`'s live entries the tracker has seen fill."""
+        with self._lock:
+            live = [v for k, v in self._live.items() if k[0] == symbol]
+        return [(v.client_id, v.order.intent) for v in live if v.order is not None and self._state(v) == "filled"]
+
+    def _reconcile(self, symbol: str, live: dict, gone: set) -> dict:
+        """
+        `symbol`'s live entries as OANDA has them: known orders still pending are kept, an
+        unknown tagged one (a create or replace whose response was lost) is adopted for its
+        side, the rest are cancelled. Entries OANDA no longer has are dropped, unless the
+        tracker has them finished.
+        """
+        r = orders.OrderList(accountID=self.account_id, params={"instrument": symbol, "state": "PENDING"})
+        pending = [o for o in self.api.request(r).get("orders", [])
+                   if o.get("clientExtensions", {}).get("tag") == RESTING_TAG]
+        known = {v.order_id: k for k, v in live.items() if k not in gone}
+        out = {}
+        for o in sorted(pending, key=lambda o: (o["id"] not in known, -int(o["id"]))):  # known, then newest
+            key = (symbol, "buy" if float(o["units"]) > 0 else "sell")
+            if key in out and out[key].order_id != o["id"]:
+                self._cancel(_Live(o["id"], None, None, None))
+            elif known.get(o["id"]) == key:
+                out[key] = live[key]
+            else:
+                out[key] = _Live(o["id"], o["clientExtensions"].get("id"), None, None)
+                log_event(log, "resting_adopted", level=logging.WARNING, symbol=symbol, side=key[1],
+                          order_id=o["id"], client_id=out[key].client_id)
+        for key in gone - out.keys():
+            out[key] = live[key]
+        return out
+
+    def sync(self, symbol: str, desired, bar_close: datetime) -> dict:
+        """Make `symbol`'s resting orders `desired` (valid through the bar ending at `bar_close`)."""
+        gtd = bar_close + self.expiry
+        desired = {o.key: o for o in desired}
+        jobs = {}
+        with self._lock:
+            live = {k: v for k, v in self._live.items() if k[0] == symbol}
+            unsure = symbol in self._unsure
+        # filled or cancelled (e.g. expired) orders are gone: nothing to replace or cancel
+        gone = {k for k, v in live.items() if self._state(v) in FINAL_STATES}
+        if unsure or any(k not in live or k in gone for k in desired):
+            try:
+                live = self._reconcile(symbol, live, gone)
+            except Exception as e:
+                # without OANDA's view a create could double an order: only move the known ones
+                log_event(log, "resting_error", level=logging.ERROR, symbol=symbol, error=str(e))
+                desired = {k: o for k, o in desired.items() if k in live and k not in gone}
+            else:
+                with self._lock:
+                    for key in [k for k in self._live if k[0] == symbol]:
+                        del self._live[key]
+                    self._live.update(live)
+                    self._unsure.discard(symbol)
+        ids = {key: client_order_id(CLIENT_TAGS[key[1]], symbol, bar_close) for key in desired}
+        for key, order in desired.items():
+            current = live.get(key)
+            if current is None or key in gone:
+                jobs[key] = self._pool.submit(self._create, order, gtd, ids[key])
+            elif current.order != order or current.expires <= bar_close:
+                jobs[key] = self._pool.submit(self._replace, current, order, gtd, ids[key])
+        for key in live.keys() - desired.keys() - gone:
+            jobs[key] = self._pool.submit(self._cancel, live[key])
+
+        counts = {"kept": len(desired) - sum(k in desired for k in jobs), "sent": len(jobs), "failed": 0}
+        with self._lock:
+            for key in gone - desired.keys():
+                self._live.pop(key, None)
+        for key, job in jobs.items():
+            try:
+                order_id = job.result()
+            except Exception as e:
+                # OANDA may have acted on it: keep the entry as it was and reconcile next sync
+                counts["failed"] += 1
+                log_event(log, "resting_error", level=logging.ERROR, symbol=symbol, side=key[1], error=str(e))
+                with self._lock:
+                    self._unsure.add(symbol)
+                continue
+            with self._lock:
+                if order_id is None:
+                    self._live.pop(key, None)   # cancelled (or already gone)
+                else:
+                    self._live[key] = _Live(order_id, ids[key], desired[key], gtd)
+        return counts
+
+    def cancel_all(self) -> int:
+        """Cancel every pending order tagged by this module (e.g. left over from a previous run)."""
+        r = orders.OrdersPending(accountID=self.account_id)
+        pending = [o for o in self.api.request(r).get("orders", [])
+                   if o.get("clientExtensions", {}).get("tag") == RESTING_TAG]
+        list(self._pool.map(self._cancel, [_Live(o["id"], None, None, None) for o in pending]))
+        with self._lock:
+            self._live.clear()
+            self._unsure.clear()
+        return len(pending)
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+from utils.candle_decode import CandleArrays
+
+# -----------------------------
+# 0️⃣ Layout
+# -----------------------------
+CANDLE_FIELDS = (
+    'volume',
+    'mid_o', 'mid_h', 'mid_l', 'mid_c',
+    'bid_o', 'bid_h', 'bid_l', 'bid_c',
+    'ask_o', 'ask_h', 'ask_l', 'ask_c',
+)
+# Column names strategies read, aliased onto the raw mid/volume arrays (no copies)
+ALIASES = {'Open': 'mid_o', 'High': 'mid_h', 'Low': 'mid_l', 'Close': 'mid_c', 'Volume': 'volume'}
+
+
+def candle_fields(*columns) -> tuple:
+    """
+    Raw fields to keep for the given strategy columns ('Close', 'High', 'ask_c', ...),
+    in CANDLE_FIELDS order. Each argument is an iterable, e.g. a strategy's `columns`.
+    """
+    wanted = {ALIASES.get(c, c) for cols in columns for c in cols}
+    return tuple(f for f in CANDLE_FIELDS if f in wanted)
+
+
+def price_components(fields) -> str:
+    """
+    The `price` parameter to request for `fields`: "M" when only mid (and volume) is
+    read, otherwise "BA" — mid is then derived from bid/ask rather than downloaded.
+    """
+    return "BA" if any(f.startswith(('bid_', 'ask_')) for f in fields) else "M"
+
+
+def parse_time_ns(value: str) -> int:
+    """OANDA RFC3339 time ('2025-09-01T10:05:00.000000000Z') → epoch nanoseconds."""
+    return int(np.datetime64(value.rstrip('Z'), 'ns').astype(np.int64))
+
+
+# -----------------------------
+# 1️⃣ Ring buffer
+# -----------------------------
+class BarRingBuffer:
+    """
+    Fixed-capacity window of complete candles for one symbol, backed by preallocated arrays.
+
+    Every row is written twice (at slot i and i + capacity), so the newest `len(self)`
+    bars are always one contiguous slice and view() / frame() hand out zero-copy,
+    read-only arrays. Views are only valid until the next append; the per-symbol
+    loops consume them before fetching again.
+    """
+
+    def __init__(self, capacity: int, fields=CANDLE_FIELDS, instrument: str = None, granularity: str = None):
+        self.capacity = capacity
+        self.instrument = instrument
+        self.granularity = granularity
+        self.price = price_components(fields)
+        derived = [f for f in fields if f.startswith('mid_')] if self.price == "BA" else []
+        # bid/ask behind every derived mid field are stored too (mid = (bid + ask) / 2)
+        needed = set(fields) | {f"{c}_{f[-1]}" for f in derived for c in ('bid', 'ask')}
+        self.fields = tuple(f for f in CANDLE_FIELDS if f in needed)
+        self._col = {name: i for i, name in enumerate(self.fields)}
+        self.source_fields = tuple(f for f in self.fields if f not in derived)  # what the payload must provide
+        self._parse = [(i, *name.split('_')) for i, name in enumerate(self.fields)
+                       if name != 'volume' and name not in derived]
+        self._derive = [(self._col[f], self._col[f"bid_{f[-1]}"], self._col[f"ask_{f[-1]}"]) for f in derived]
+        self._volume = self._col.get('volume')
+        self._data = np.full((len(self.fields), 2 * capacity), np.nan)
+        self._time = np.zeros(2 * capacity, dtype=np.int64)
+        self._pos = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        self._pos = 0
+        self._size = 0
+
+    @property
+    def last_time(self):
+        """Open time (epoch ns) of the newest bar, or None when empty."""
+        return int(self._time[self._pos - 1 + self.capacity]) if self._size else None
+
+    def append(self, t_ns: int, values) -> None:
+        """Append one bar; `values` is aligned with self.fields."""
+        p, cap = self._pos, self.capacity
+        self._data[:, p] = values
+        self._data[:, p + cap] = values
+        self._time[p] = self._time[p + cap] = t_ns
+        self._pos = (p + 1) % cap
+        self._size = min(self._size + 1, cap)
+
+    def append_many(self, t_ns: np.ndarray, values: np.ndarray) -> None:
+        """Append n bars at once; `values` is (len(self.fields), n)."""
+        n, cap = len(t_ns), self.capacity
+        if n > cap:
+            t_ns, values, n = t_ns[-cap:], values[:, -cap:], cap
+        slots = (self._pos + np.arange(n)) % cap
+        self._data[:, slots] = values
+        self._data[:, slots + cap] = values
+        self._time[slots] = self._time[slots + cap] = t_ns
+        self._pos = (self._pos + n) % cap
+        self._size = min(self._size + n, cap)
+
+    def extend(self, candles) -> int:
+        """
+        Append the complete candles from an InstrumentsCandles payload that are newer than
+        the last stored bar, parsing straight into the arrays. Returns the number appended.
+        Also takes already decoded CandleArrays (see utils.candle_decode).
+        """
+        if isinstance(candles, CandleArrays):
+            return self._extend_arrays(candles)
+        last = self.last_time
+        added = 0
+        row = np.empty(len(self.fields))
+        for c in candles:
+            if not c['complete']:
+                continue
+            t = parse_time_ns(c['time'])
+            if last is not None and t <= last:
+                continue
+            if self._volume is not None:
+                row[self._volume] = c['volume']
+            for i, comp, field in self._parse:
+                row[i] = c[comp][field]
+            for i, b, a in self._derive:
+                row[i] = (row[b] + row[a]) / 2
+            self.append(t, row)
+            added += 1
+        return added
+
+    def _extend_arrays(self, candles: CandleArrays) -> int:
+        keep = candles.complete.copy()
+        if self._size:
+            keep &= candles.time > self.last_time
+        if not keep.any():
+            return 0
+        values = np.empty((len(self.fields), int(keep.sum())))
+        for name in self.source_fields:
+            values[self._col[name]] = candles.values[name][keep]
+        for i, b, a in self._derive:
+            values[i] = (values[b] + values[a]) / 2
+        self.append_many(candles.time[keep], values)
+        return values.shape[1]
+
+    def refresh(self, fetch, incremental_count: int = 5) -> int:
+        """
+        Top the buffer up from fetch(count) → candles, returning the number of new bars.
+
+        `fetch` should request the `self.price` components. Once warm only the last few
+        candles are requested; if they no longer reach back to the newest stored bar
+        (restart, weekend gap) the full window is reloaded.
+        """
+        if self._size:
+            candles = fetch(incremental_count)
+            if self.overlaps(candles):
+                return self.extend(candles)
+            self.clear()
+        return self.extend(fetch(self.capacity + 1))  # +1: the forming bar comes back incomplete
+
+    def overlaps(self, candles) -> bool:
+        """True if the payload reaches back to the newest stored bar (i.e. no bars were missed)."""
+        last = self.last_time
+        if last is None or len(candles) == 0:
+            return False
+        first = candles.time[0] if isinstance(candles, CandleArrays) else parse_time_ns(candles[0]['time'])
+        return first <= last
+
+    # -----------------------------
+    # Views
+    # -----------------------------
+    def _window(self) -> slice:
+        start = (self._pos - self._size) % self.capacity
+        return slice(start, start + self._size)
+
+    def view(self, name: str) -> np.ndarray:
+        """Zero-copy, read-only view of one field over the stored bars (oldest first)."""
+        v = self._data[self._col[ALIASES.get(name, name)], self._window()]
+        v.flags.writeable = False
+        return v
+
+    def times(self) -> np.ndarray:
+        v = self._time[self._window()]
+        v.flags.writeable = False
+        return v
+
+    def frame(self) -> pd.DataFrame:
+        """
+        The stored bars as a DataFrame indexed by 'time', with the raw fields and the
+        Open/High/Low/Close/Volume aliases, all backed by the buffer without copying.
+        attrs carry the instrument and granularity, which key the shared indicator cache.
+        """
+        columns = {name: self.view(name) for name in self.fields}
+        columns.update({alias: self.view(name) for alias, name in ALIASES.items() if name in self._col})
+        index = pd.DatetimeIndex(self.times().view('datetime64[ns]'), name='time').tz_localize('UTC')
+        df = pd.DataFrame(columns, index=index, copy=False)
+        if self.instrument is not None:
+            df.attrs.update(instrument=self.instrument, granularity=self.granularity)
+        return df
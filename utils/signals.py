@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+import pandas as pd
+from utils.ring_buffer import ALIASES
+
+# -----------------------------
+# 0️⃣ Signal → order mapping
+# -----------------------------
+# How run_symbol trades a bar's TotalSignal: 2 → buy, 1 → sell, anything else → no trade.
+SIGNAL_SIDES = {2: "buy", 1: "sell"}
+
+
+@dataclass(slots=True)
+class OrderIntent:
+    """A market order a strategy wants placed at bar close, with SL/TP anchored on the close."""
+    symbol: str
+    side: str
+    units: int
+    price: float
+    sl_price: float
+    tp_price: float
+    time: pd.Timestamp
+    signal: int
+
+    @property
+    def sl_distance(self) -> float:
+        return abs(self.price - self.sl_price)
+
+    @property
+    def tp_distance(self) -> float:
+        return abs(self.tp_price - self.price)
+
+
+# -----------------------------
+# 1️⃣ Per-bar decision shared by the live loops and the replay engine
+# -----------------------------
+def prepare_candles(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep complete bars, add the Open/High/Low/Close/Volume columns strategies read, index by time."""
+    df = df[df['complete']]
+    df = df.assign(**{alias: df[name] for alias, name in ALIASES.items() if name in df})
+    df = df.sort_values('time')
+    return df.set_index('time')
+
+
+def evaluate_bar(symbol: str, df: pd.DataFrame, strategy, backcandles: int, units: int,
+                 ATR_multiplier_SL: float, ATR_multiplier_TP: float):
+    """
+    Run `strategy` on prepared candles and turn the last bar into an order.
+
+    Returns (last row, OrderIntent or None). The strategy is called exactly as the
+    live loops always have: strategy(df, backcandles, ATR_multiplier_SL).
+    """
+    bar_time = df.index[-1]
+    df = strategy(df, backcandles, ATR_multiplier_SL)  # returns df with 'TotalSignal' & 'atr'
+    last = df.iloc[-1]
+    intent = build_intent(symbol, int(last['TotalSignal']), float(last['Close']), last['atr'], bar_time, units,
+                          ATR_multiplier_SL, ATR_multiplier_TP)
+    return last, intent
+
+
+def build_intent(symbol: str, signal: int, close: float, atr: float, bar_time, units: int,
+                 ATR_multiplier_SL: float, ATR_multiplier_TP: float):
+    """TotalSignal + close + ATR → OrderIntent with ATR-scaled SL/TP, or None for no trade."""
+    side = SIGNAL_SIDES.get(signal)
+    if side is None:
+        return None
+
+    # Convert ATR to price distance
+    sl_distance = ATR_multiplier_SL * atr
+    tp_distance = ATR_multiplier_TP * atr
+    if side == "buy":
+        sl_price, tp_price = close - sl_distance, close + tp_distance
+    else:
+        sl_price, tp_price = close + sl_distance, close - tp_distance
+    return OrderIntent(symbol, side, units, close, sl_price, tp_price, bar_time, signal)
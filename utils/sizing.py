@@ -0,0 +1,129 @@
+import threading
+import time
+import numpy as np
+from oandapyV20.endpoints.accounts import AccountSummary
+
+from utils.exposure import ConversionRates
+
+# -----------------------------
+# 0️⃣ Cached account balance
+# -----------------------------
+def fetch_account_summary(api, account_id) -> tuple:
+    """(NAV, account currency) from one AccountSummary call."""
+    r = AccountSummary(accountID=account_id)
+    account = api.request(r)["account"]
+    return float(account["NAV"]), account["currency"]
+
+
+class CachedBalance:
+    """NAV refreshed at most once per `max_age` seconds; the last value is kept if a refresh fails."""
+
+    def __init__(self, fetch, max_age: float = 60.0):
+        self.fetch = fetch
+        self.max_age = max_age
+        self.value = None
+        self.currency = None
+        self._fetched = 0.0
+
+    def get(self):
+        if self.value is None or time.monotonic() - self._fetched >= self.max_age:
+            try:
+                self.value, self.currency = self.fetch()
+                self._fetched = time.monotonic()
+            except Exception:
+                pass
+        return self.value
+
+
+# -----------------------------
+# 1️⃣ Vectorized fixed-fractional sizing
+# -----------------------------
+def fixed_fractional_units(risk_amount, sl_distance, quote_value, units_precision, min_size,
+                           max_units=None) -> np.ndarray:
+    """
+    Units so that hitting the stop loses `risk_amount` (home currency), for K orders at once.
+
+    A one-unit position loses sl_distance in the quote currency at the stop, i.e.
+    sl_distance · quote_value in home currency. Units are floored to each
+    instrument's trade-units precision; orders below its minimum size become 0.
+    """
+    sl_distance = np.asarray(sl_distance, dtype=np.float64)
+    quote_value = np.asarray(quote_value, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        units = risk_amount / (sl_distance * quote_value)
+    units = np.where(np.isfinite(units) & (units > 0), units, 0.0)
+    if max_units is not None:
+        units = np.minimum(units, max_units)
+    scale = 10.0 ** np.asarray(units_precision, dtype=np.float64)
+    units = np.floor(units * scale * (1 + 1e-9)) / scale  # rel. epsilon: rates go through exp/log
+    return np.where(units >= np.asarray(min_size, dtype=np.float64), units, 0.0)
+
+
+# -----------------------------
+# 2️⃣ Order batch stage
+# -----------------------------
+class FixedFractionalSizing:
+    """
+    OrderBatcher stage that replaces the fixed `units` of every pending order with a
+    fixed-fractional size: `risk_fraction` of NAV lost if the stop is hit.
+
+    Conversion rates come from the batch's closes (no REST calls) and the NAV from a
+    cached AccountSummary, refreshed at most once per `max_age`. NAV is in the
+    account's currency, so the rates are re-homed to it once the first summary is
+    in; a `home` that differs from it is a configuration error. Orders keep their
+    units while NAV or a conversion rate is unknown; orders sized below the
+    instrument's minimum trade size are dropped.
+    """
+
+    def __init__(self, symbols, specs, balance_fn, risk_fraction: float = 0.005, home: str = None,
+                 max_units: float = None, max_age: float = 60.0):
+        self.symbols = list(symbols)
+        self.home = home
+        self.rates = ConversionRates(self.symbols, home or "USD")
+        self.specs = specs
+        self.balance = CachedBalance(balance_fn, max_age)
+        self.risk_fraction = risk_fraction
+        self.max_units = max_units
+        self._lock = threading.Lock()
+
+    def _rehome(self, currency) -> None:
+        if currency is None or currency == self.rates.home:
+            return
+        if self.home is not None:
+            raise ValueError(f"FixedFractionalSizing: home {self.home} but the account is in {currency}")
+        rates = ConversionRates(self.symbols, currency)
+        rates.log_price = self.rates.log_price
+        rates.update({})
+        self.rates = rates
+
+    def __call__(self, batch):
+        with self._lock:
+            self.rates.update(batch.closes)  # late closes too: a rate is just the latest price
+            if not batch.intents:
+                return batch.intents
+            nav = self.balance.get()
+            self._rehome(self.balance.currency)
+            known = [i for i in batch.intents if i.symbol in self.rates.pair_index]
+            quote = self.rates.quote[[self.rates.pair_index[i.symbol] for i in known]]
+            quote_value = self.rates.value[quote]
+        if nav is None:
+            return batch.intents
+
+        specs = [self.specs.get(i.symbol) for i in known]
+        units = fixed_fractional_units(
+            nav * self.risk_fraction,
+            [i.sl_distance for i in known],
+            quote_value,
+            [s.trade_units_precision if s else 0 for s in specs],
+            [s.minimum_trade_size if s else 1 for s in specs],
+            self.max_units,
+        )
+        dropped = set()
+        for intent, u, v in zip(known, units, quote_value):
+            if np.isnan(v):
+                continue  # no conversion path yet: keep the order's own units
+            if u <= 0:
+                dropped.add(id(intent))
+            else:
+                intent.units = int(u) if u == int(u) else float(u)
+        return [i for i in batch.intents if id(i) not in dropped]
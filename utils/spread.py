@@ -0,0 +1,89 @@
+import threading
+import numpy as np
+
+# -----------------------------
+# 0️⃣ Rolling spread statistics
+# -----------------------------
+class RollingSpread:
+    """
+    Last `window` bar-close spreads (ask_c - bid_c) per symbol in one N×window ring.
+
+    update() writes one column per bar (O(N)); medians are only taken for the
+    symbols that are asking to trade, so the cost per cycle is O(K·window) for K
+    signals rather than a full recomputation across the universe.
+    """
+
+    def __init__(self, symbols, window: int = 288):
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.window = window
+        self._ring = np.full((len(self.symbols), window), np.nan)
+        self.last = np.full(len(self.symbols), np.nan)
+        self._pos = 0
+
+    def update(self, spreads: dict) -> None:
+        col = np.full(len(self.symbols), np.nan)
+        for sym, spread in spreads.items():
+            i = self.index.get(sym)
+            if i is not None and spread is not None:
+                col[i] = spread
+        self._ring[:, self._pos] = col
+        self.last = np.where(np.isnan(col), self.last, col)
+        self._pos = (self._pos + 1) % self.window
+
+    def amend(self, spreads: dict) -> None:
+        """Write spreads that arrived after their bar's column was added into that column."""
+        col = (self._pos - 1) % self.window
+        for sym, spread in spreads.items():
+            i = self.index.get(sym)
+            if i is not None and spread is not None:
+                self._ring[i, col] = spread
+                self.last[i] = spread
+
+    def median(self, symbols) -> np.ndarray:
+        idx = np.array([self.index[s] for s in symbols], dtype=np.int64)
+        rows = self._ring[idx]
+        out = np.full(len(idx), np.nan)
+        seen = (~np.isnan(rows)).any(axis=1)
+        if seen.any():
+            out[seen] = np.nanmedian(rows[seen], axis=1)
+        return out
+
+
+# -----------------------------
+# 1️⃣ Order batch stage
+# -----------------------------
+class SpreadGate:
+    """
+    OrderBatcher stage that drops signals the spread would eat.
+
+    An order is dropped when the current spread is more than `max_stop_ratio` of its
+    stop distance (exotics such as TRY_JPY or EUR_ZAR routinely quote spreads near the
+    1·ATR stop), or more than `max_median_multiple` times the pair's rolling median
+    spread (a temporary blow-out: rollover, news). Symbols without a spread yet pass.
+    """
+
+    def __init__(self, symbols, window: int = 288, max_stop_ratio: float = 0.3,
+                 max_median_multiple: float = 2.0):
+        self.spreads = RollingSpread(symbols, window)
+        self.max_stop_ratio = max_stop_ratio
+        self.max_median_multiple = max_median_multiple
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        known = [i for i in batch.intents if i.symbol in self.spreads.index]
+        with self._lock:
+            if not batch.late:
+                self.spreads.update(batch.spreads)
+            else:
+                self.spreads.amend(batch.spreads)  # a straggler's spread still belongs to its bar
+            if not known:
+                return batch.intents
+            symbols = [i.symbol for i in known]
+            median = self.spreads.median(symbols)
+        current = np.array([batch.spreads.get(s, np.nan) for s in symbols], dtype=np.float64)
+        stop = np.array([i.sl_distance for i in known], dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            too_wide = (current > self.max_stop_ratio * stop) | (current > self.max_median_multiple * median)
+        dropped = {id(i) for i, wide in zip(known, too_wide) if wide}
+        return [i for i in batch.intents if id(i) not in dropped]
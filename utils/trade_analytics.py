@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+from oandapyV20.endpoints import trades
+
+# -----------------------------
+# 0️⃣ Schema
+# -----------------------------
+# Flat, typed columns built once from the nested TradesList JSON.
+FLOAT_FIELDS = {
+    "price": "open_price",
+    "averageClosePrice": "close_price",
+    "realizedPL": "realizedPL",
+    "financing": "financing",
+    "initialUnits": "units",
+    "initialMarginRequired": "initial_margin",
+}
+TIME_FIELDS = {
+    "openTime": "openTime",
+    "closeTime": "closeTime",
+}
+DURATION_BINS = [0, 1, 5, 15, 60, 240, 1440, np.inf]
+DURATION_LABELS = ["<1m", "1-5m", "5-15m", "15-60m", "1-4h", "4-24h", ">1d"]
+BREAKDOWNS = {
+    "instrument": ["instrument"],
+    "side": ["side"],
+    "hour": ["hour"],
+    "duration": ["duration_bucket"],
+    "exit": ["exit_reason"],
+}
+
+
+# -----------------------------
+# 1️⃣ Fetch
+# -----------------------------
+def fetch_closed_trades(api, account_id, page_size: int = 500):
+    """Page through TradesList and return the raw CLOSED trade dicts (newest first)."""
+    all_trades = []
+    before_id = None
+    while True:
+        params = {"state": "CLOSED", "count": page_size}
+        if before_id:
+            params["beforeID"] = before_id
+        r = trades.TradesList(accountID=account_id, params=params)
+        batch = api.request(r)["trades"]
+        if not batch:
+            break
+        all_trades.extend(batch)
+        before_id = batch[-1]["id"]
+        if len(batch) < page_size:
+            break
+    return all_trades
+
+
+# -----------------------------
+# 2️⃣ Normalization
+# -----------------------------
+def _nested(col: pd.Series, key: str) -> pd.Series:
+    """Pull `key` out of a column of dicts (missing dicts → NaN) without a per-row apply."""
+    if col is None:
+        return pd.Series(np.nan, dtype=object)
+    return col.str.get(key)
+
+
+def normalize_trades(raw) -> pd.DataFrame:
+    """
+    Flatten closed trades into typed columns, once.
+
+    `raw` is either the list of trade dicts returned by TradesList or a DataFrame
+    built from it (as the EDA notebook does). Nested takeProfitOrder/stopLossOrder
+    dicts are reduced to their price and state; every string number is parsed
+    with a single vectorized to_numeric call per column.
+    """
+    src = raw if isinstance(raw, pd.DataFrame) else pd.DataFrame(list(raw))
+    out = pd.DataFrame(index=src.index)
+    out["tradeID"] = pd.to_numeric(src["id"]).astype(np.int64)
+    out["instrument"] = src["instrument"].astype("category")
+
+    for field, name in FLOAT_FIELDS.items():
+        if field in src:
+            out[name] = pd.to_numeric(src[field], errors="coerce").astype(np.float64)
+        else:
+            out[name] = np.nan
+    for field, name in TIME_FIELDS.items():
+        out[name] = pd.to_datetime(src[field], utc=True, format="ISO8601")
+
+    for order, prefix in (("takeProfitOrder", "tp"), ("stopLossOrder", "sl")):
+        col = src[order] if order in src else None
+        out[f"{prefix}_price"] = pd.to_numeric(_nested(col, "price"), errors="coerce").astype(np.float64)
+        out[f"{prefix}_state"] = _nested(col, "state").astype("category")
+
+    out["net_pl"] = out["realizedPL"] + out["financing"].fillna(0.0)
+    out["side"] = pd.Categorical.from_codes(
+        (out["units"].to_numpy() < 0).astype(np.int8), categories=["BUY", "SELL"]
+    )
+    out["is_winner"] = out["net_pl"] > 0
+    out["duration_minutes"] = (out["closeTime"] - out["openTime"]).dt.total_seconds() / 60
+    out["duration_bucket"] = pd.cut(out["duration_minutes"], DURATION_BINS,
+                                    labels=DURATION_LABELS, right=False)
+    out["hour"] = out["closeTime"].dt.hour.astype(np.int8)
+    out["exit_reason"] = classify_exits(out)
+    return out
+
+
+def classify_exits(df: pd.DataFrame) -> pd.Categorical:
+    """
+    Label each trade TP / SL / MANUAL / OTHER.
+
+    A FILLED dependent order is authoritative. When both are known but neither
+    filled (e.g. CANCELLED: a manual, margin-call or opposite-signal close) the exit is
+    MANUAL. Only when the states are missing, fall back to whichever of the SL/TP
+    prices the average close price landed nearest to.
+    """
+    tp_state, sl_state = df["tp_state"], df["sl_state"]
+    tp_filled = (tp_state == "FILLED").to_numpy()
+    sl_filled = (sl_state == "FILLED").to_numpy()
+    missing = (tp_state.isna() & sl_state.isna()).to_numpy()
+    manual = ~(tp_filled | sl_filled | missing)
+
+    close = df["close_price"].to_numpy()
+    tp_gap = np.abs(close - df["tp_price"].to_numpy())
+    sl_gap = np.abs(close - df["sl_price"].to_numpy())
+    near_tp = missing & (tp_gap < sl_gap)
+    near_sl = missing & (sl_gap <= tp_gap)
+
+    # 0 = OTHER, 1 = TP, 2 = SL, 3 = MANUAL (np.nan comparisons are False → OTHER)
+    codes = np.zeros(len(df), dtype=np.int8)
+    codes[tp_filled | near_tp] = 1
+    codes[sl_filled | near_sl] = 2
+    codes[manual] = 3
+    return pd.Categorical.from_codes(codes, categories=["OTHER", "TP", "SL", "MANUAL"])
+
+
+# -----------------------------
+# 3️⃣ Breakdowns
+# -----------------------------
+def _summarize(grouped: pd.DataFrame) -> pd.DataFrame:
+    result = pd.DataFrame({
+        "Total_PL": grouped["pl_sum"],
+        "Avg_PL": grouped["pl_sum"] / grouped["count"],
+        "Trade_Count": grouped["count"],
+        "Win_Rate": grouped["wins"] / grouped["count"],
+        "Avg_Duration_Min": grouped["dur_sum"] / grouped["count"],
+    })
+    return result[result["Trade_Count"] > 0]
+
+
+def trade_breakdowns(df: pd.DataFrame) -> dict:
+    """
+    Compute every breakdown from a single grouped pass.
+
+    The trades are aggregated once over all keys (instrument × side × hour ×
+    duration bucket × exit) into a small cube of additive sums; each breakdown is a
+    cheap re-aggregation of that cube rather than another pass over the trades.
+    """
+    keys = sorted({k for cols in BREAKDOWNS.values() for k in cols})
+    cube = (
+        df.assign(wins=df["is_winner"].astype(np.int64))
+          .groupby(keys, observed=True, sort=False)
+          .agg(pl_sum=("net_pl", "sum"),
+               count=("net_pl", "size"),
+               wins=("wins", "sum"),
+               dur_sum=("duration_minutes", "sum"))
+    )
+    out = {}
+    for name, cols in BREAKDOWNS.items():
+        summary = _summarize(cube.groupby(level=cols, observed=True).sum())
+        if name == "instrument":
+            summary = summary.sort_values("Total_PL", ascending=False)
+        else:
+            summary = summary.sort_index()
+        out[name] = summary
+    return out
+
+
+def performance_summary(df: pd.DataFrame) -> dict:
+    """Headline numbers printed by the EDA notebook."""
+    pl = df["net_pl"].to_numpy()
+    wins = df["is_winner"].to_numpy()
+    return {
+        "total_trades": len(df),
+        "total_pl": float(pl.sum()),
+        "win_rate": float(wins.mean() * 100) if len(df) else np.nan,
+        "avg_winner": float(pl[wins].mean()) if wins.any() else np.nan,
+        "avg_loser": float(pl[~wins].mean()) if (~wins).any() else np.nan,
+    }
+
+
+def analyze_closed_trades(raw):
+    """Normalize trades and return (flat DataFrame, summary dict, breakdowns dict)."""
+    df = normalize_trades(raw)
+    return df, performance_summary(df), trade_breakdowns(df)
@@ -0,0 +1,81 @@
+import math
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# 0️⃣ Closed-form Z-score triggers
+# -----------------------------
+def z_score_triggers(prev_closes, lookback: int, threshold: float) -> tuple:
+    """
+    Close prices at which the next bar's Z-score crosses ∓threshold.
+
+    The next bar's window holds the last L-1 closes (mean μ, squared deviations M2)
+    plus the unknown close x. With δ = x - μ and c = (L-1)/L the window's mean
+    deviation is cδ and its sample variance (M2 + cδ²)/(L-1), so Z² = k² solves to
+    δ² = k²·M2 / (c·(c(L-1) - k²)). Returns (long, short): Z < -k iff x < long and
+    Z > k iff x > short. If |Z| cannot reach k in this window, (-inf, inf).
+    """
+    y = np.asarray(prev_closes, dtype=np.float64)[-(lookback - 1):]
+    mu = y.mean()
+    m2 = float(((y - mu) ** 2).sum())
+    c = (lookback - 1) / lookback
+    k2 = threshold * threshold
+    denom = c * (c * (lookback - 1) - k2)
+    if denom <= 0:
+        return -math.inf, math.inf
+    d = math.sqrt(k2 * m2 / denom)
+    return mu - d, mu + d
+
+
+# -----------------------------
+# 1️⃣ Precomputed bar-close decision for mean_reversion_scalping
+# -----------------------------
+class ZScoreTriggers:
+    """
+    mean_reversion_scalping's decision for the next bar, armed when the previous one closes.
+
+    arm() takes the buffer and the strategy's ATR for the bar that just closed and stores
+    the long/short trigger prices. At the next close decide() is two float
+    comparisons plus an O(1) Wilder ATR step; the full indicator pass can then run
+    after the order is out, and check() compares the two.
+    """
+
+    def __init__(self, lookback: int = 20, z_score_threshold: float = 2.0, atr_length: int = 14,
+                 tol: float = 1e-4):
+        self.lookback = lookback
+        self.threshold = z_score_threshold
+        self.atr_length = atr_length
+        self.tol = tol            # ATR parity: pandas_ta versions differ in the seed (see utils/lookback)
+        self.time = None          # ns time of the bar the triggers were armed on
+        self.long = self.short = None
+        self.atr = self.prev_close = None
+
+    def arm(self, buffer, atr: float) -> None:
+        closes = buffer.view('Close')
+        if len(closes) < self.lookback or not np.isfinite(atr):
+            self.time = None
+            return
+        self.long, self.short = z_score_triggers(closes, self.lookback, self.threshold)
+        self.atr, self.prev_close = float(atr), float(closes[-1])
+        self.time = buffer.last_time
+
+    def decide(self, buffer):
+        """(TotalSignal, ATR) for the buffer's last bar, or None if not armed on the bar before it."""
+        times = buffer.times()
+        if self.time is None or len(times) < 2 or times[-2] != self.time:
+            return None
+        high, low = float(buffer.view('High')[-1]), float(buffer.view('Low')[-1])
+        close = float(buffer.view('Close')[-1])
+        signal = 1 if close < self.long else 2 if close > self.short else 0
+        tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        return signal, self.atr + (tr - self.atr) / self.atr_length
+
+    def check(self, last: pd.Series, signal: int, atr: float) -> dict:
+        """Differences between decide() and the full computation's row (empty when they agree)."""
+        out = {}
+        z = float(last['Z_Score'])
+        if signal != int(last['TotalSignal']) and not abs(abs(z) - self.threshold) < 1e-9:
+            out.update(fast_signal=signal, signal=int(last['TotalSignal']), z_score=z)
+        if abs(atr - float(last['atr'])) > self.tol * abs(float(last['atr'])):
+            out.update(fast_atr=atr, atr=float(last['atr']))
+        return out
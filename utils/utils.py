@@ -3,42 +3,46 @@ import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta, timezone
-from oandapyV20 import API
 from oandapyV20.endpoints import instruments, orders
-from oandapyV20.endpoints.accounts import AccountInstruments
 import warnings
+from types import MappingProxyType
 from dotenv import load_dotenv
+from utils.api_client import GuardedAPI
+from utils.instruments import load_instrument_specs
+from utils.log import get_logger, log_event, order_fields
 # -----------------------------
 # 0️⃣ Setup
 # -----------------------------
 load_dotenv()
 account_id = os.getenv('OANDA_ACCOUNT_ID')
 access_key = os.getenv('OANDA_ACCESS_KEY')
-api = API(access_token=access_key)
+api = GuardedAPI(access_token=access_key)  # request timeouts + per-endpoint circuit breaker
 warnings.filterwarnings("ignore")
+log = get_logger(__name__)
 
 # -----------------------------
 # Instrument Precision Handling
 # -----------------------------
-instrument_precisions = {}
+_specs = {}
+instrument_specs = MappingProxyType(_specs)  # read-only view, filled once by load_precisions
 
 def load_precisions(account_id):
-    """Fetch instrument precision (number of decimals allowed for prices)."""
-    r = AccountInstruments(accountID=account_id)
-    response = api.request(r)
-    for inst in response["instruments"]:
-        instrument_precisions[inst["name"]] = inst["displayPrecision"]
+    """Load the InstrumentSpec table (precision, pip location, min size, margin rate) once."""
+    if not _specs:
+        _specs.update(load_instrument_specs(api, account_id))
 
 def format_price(price, instrument):
     """Format price according to instrument precision."""
-    precision = instrument_precisions.get(instrument, 5)  # default fallback
-    return str(round(price, precision))
+    spec = _specs.get(instrument)
+    if spec is None:
+        return "%.5f" % price  # default fallback
+    return spec.format_price(price)
 
 # -----------------------------
 # 1️⃣ Helper functions
 # -----------------------------
-def get_candles(symbol: str, count: int = 20, granularity: str = 'M1'):
-    params = {"count": count, "granularity": granularity, "price": "MBA"}
+def get_candles(symbol: str, count: int = 20, granularity: str = 'M1', price: str = "MBA"):
+    params = {"count": count, "granularity": granularity, "price": price}
     r = instruments.InstrumentsCandles(instrument=symbol, params=params)
     response = api.request(r)
     return response['candles']
@@ -46,23 +50,17 @@ def get_candles(symbol: str, count: int = 20, granularity: str = 'M1'):
 def candles_to_df(candles):
     records = []
     for c in candles:
-        records.append({
+        record = {
             "time": pd.to_datetime(c["time"]),
             "complete": c["complete"],
             "volume": c["volume"],
-            "mid_o": float(c["mid"]["o"]),
-            "mid_h": float(c["mid"]["h"]),
-            "mid_l": float(c["mid"]["l"]),
-            "mid_c": float(c["mid"]["c"]),
-            "bid_o": float(c["bid"]["o"]),
-            "bid_h": float(c["bid"]["h"]),
-            "bid_l": float(c["bid"]["l"]),
-            "bid_c": float(c["bid"]["c"]),
-            "ask_o": float(c["ask"]["o"]),
-            "ask_h": float(c["ask"]["h"]),
-            "ask_l": float(c["ask"]["l"]),
-            "ask_c": float(c["ask"]["c"]),
-        })
+        }
+        # only the components that were requested ("M", "BA" or "MBA") are in the payload
+        for comp in ("mid", "bid", "ask"):
+            if comp in c:
+                for f in "ohlc":
+                    record[f"{comp}_{f}"] = float(c[comp][f])
+        records.append(record)
     return pd.DataFrame(records)
 
 def place_order(units: int, side: str, sl_price: float, tp_price: float, symbol: str):
@@ -79,4 +77,7 @@ def place_order(units: int, side: str, sl_price: float, tp_price: float, symbol:
     }
     r = orders.OrderCreate(accountID=account_id, data=data)
     response = api.request(r)
-    print(f"[{datetime.now(timezone.utc)}] Order placed: {response}")
+    log_event(log, "order_placed", symbol=symbol, side=side, units=units,
+              sl=data["order"]["stopLossOnFill"]["price"], tp=data["order"]["takeProfitOnFill"]["price"],
+              **order_fields(response))
+    return response
@@ -0,0 +1,203 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import numpy as np
+np.NaN = np.nan
+import pandas as pd
+import pandas_ta as ta
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.signals import SIGNAL_SIDES
+
+# -----------------------------
+# 0️⃣ History cache (shared by every window)
+# -----------------------------
+@dataclass
+class HistoryCache:
+    """
+    Everything the grid needs, computed once over the full history.
+
+    Rolling SMA/STD at bar t only depend on the `lookback` bars before t, so the
+    Z-score of each lookback is valid for every window that contains t. Trade
+    outcomes per bar and side do not depend on (lookback, z_score_threshold) at all:
+    run_symbol opens an independent trade on every signal bar, so a parameter set's
+    P&L is just the outcomes of the bars it signals on.
+    """
+    index: pd.DatetimeIndex
+    z: dict                                   # lookback → Z_Score array
+    outcome: dict = field(default_factory=dict)   # side → per-trade return if entered at bar t
+    exit_idx: dict = field(default_factory=dict)  # side → bar index where that trade exits
+
+
+def _first_true(mask: np.ndarray) -> np.ndarray:
+    """Per row: index of the first True, or -1."""
+    first = mask.argmax(axis=1)
+    first[~mask.any(axis=1)] = -1
+    return first
+
+
+def _outcomes(close, high, low, atr, cost, side, sl_mult, tp_mult, max_hold, chunk=20_000):
+    """Return, and exit bar, of a `side` trade entered at every bar's close with ATR-based SL/TP."""
+    n = len(close)
+    direction = 1.0 if side == "buy" else -1.0
+    sl = close - direction * sl_mult * atr
+    tp = close + direction * tp_mult * atr
+    pad = np.full(max_hold, np.nan)
+    hi = sliding_window_view(np.r_[high[1:], pad, np.nan], max_hold)[:n]
+    lo = sliding_window_view(np.r_[low[1:], pad, np.nan], max_hold)[:n]
+    cl = np.r_[close[1:], pad, np.nan]
+
+    ret = np.full(n, np.nan)
+    exit_idx = np.full(n, -1, dtype=np.int64)
+    for a in range(0, n, chunk):
+        b = min(n, a + chunk)
+        if side == "buy":
+            sl_first = _first_true(lo[a:b] <= sl[a:b, None])
+            tp_first = _first_true(hi[a:b] >= tp[a:b, None])
+        else:
+            sl_first = _first_true(hi[a:b] >= sl[a:b, None])
+            tp_first = _first_true(lo[a:b] <= tp[a:b, None])
+        # the stop wins ties within a bar (intrabar order is unknown on bars)
+        stop = (sl_first >= 0) & ((tp_first < 0) | (sl_first <= tp_first))
+        take = (tp_first >= 0) & ~stop
+        hold = np.where(stop, sl_first, np.where(take, tp_first, max_hold - 1))
+        exit_price = np.where(stop, sl[a:b], np.where(take, tp[a:b], cl[np.arange(a, b) + hold]))
+        ret[a:b] = direction * (exit_price - close[a:b]) / close[a:b] - cost[a:b]
+        exit_idx[a:b] = np.minimum(np.arange(a, b) + 1 + hold, n - 1)
+    ret[~np.isfinite(ret)] = 0.0  # warm-up ATR or no bars left
+    return ret, exit_idx
+
+
+def build_cache(bars: pd.DataFrame, lookbacks, ATR_multiplier_SL: float = 1.0,
+                ATR_multiplier_TP: float = 1.5, max_hold: int = 288) -> HistoryCache:
+    """One pass over the history: Z-score per lookback, ATR(14), and per-bar trade outcomes."""
+    close = bars['Close'].to_numpy(np.float64)
+    high = bars['High'].to_numpy(np.float64)
+    low = bars['Low'].to_numpy(np.float64)
+    atr = ta.atr(bars['High'], bars['Low'], bars['Close'], length=14).to_numpy(np.float64)
+    if 'ask_c' in bars and 'bid_c' in bars:
+        cost = ((bars['ask_c'] - bars['bid_c']) / bars['Close']).to_numpy(np.float64)
+    else:
+        cost = np.zeros(len(bars))
+
+    s = bars['Close']
+    z = {}
+    for lookback in lookbacks:
+        roll = s.rolling(window=lookback)
+        z[lookback] = ((s - roll.mean()) / roll.std()).to_numpy(np.float64)
+
+    cache = HistoryCache(bars.index, z)
+    for side in set(SIGNAL_SIDES.values()):
+        cache.outcome[side], cache.exit_idx[side] = _outcomes(
+            close, high, low, atr, cost, side, ATR_multiplier_SL, ATR_multiplier_TP, max_hold)
+    return cache
+
+
+# -----------------------------
+# 1️⃣ Per-window optimization (runs in worker processes)
+# -----------------------------
+_cache = None
+
+
+def _init_worker(cache: HistoryCache) -> None:
+    global _cache
+    _cache = cache
+
+
+def _signal_returns(z: np.ndarray, thresholds: np.ndarray, rows: slice):
+    """
+    (n_bars × n_thresholds) per-bar returns for every threshold, vectorized.
+
+    Only trades that exit inside `rows` count: an entry near the end of the window
+    resolves on bars after it, which for a train window are the test window's.
+    """
+    zz = z[rows, None]
+    # strategy: TotalSignal 1 when Z < -threshold, 2 when Z > threshold
+    below = (zz < -thresholds[None, :]) & (_cache.exit_idx[SIGNAL_SIDES[1]][rows, None] < rows.stop)
+    above = (zz > thresholds[None, :]) & (_cache.exit_idx[SIGNAL_SIDES[2]][rows, None] < rows.stop)
+    below, above = below.astype(np.float64), above.astype(np.float64)
+    r1 = _cache.outcome[SIGNAL_SIDES[1]][rows, None]
+    r2 = _cache.outcome[SIGNAL_SIDES[2]][rows, None]
+    return below * r1 + above * r2, below + above
+
+
+def _score(returns: np.ndarray, trades: np.ndarray, objective: str, min_trades: int) -> np.ndarray:
+    n = trades.sum(axis=0)
+    total = returns.sum(axis=0)
+    if objective == "sharpe":
+        mean = total / np.maximum(n, 1)
+        var = (returns ** 2).sum(axis=0) / np.maximum(n, 1) - mean ** 2
+        score = mean / np.sqrt(np.maximum(var, 1e-18)) * np.sqrt(n)
+    else:
+        score = total
+    return np.where(n >= min_trades, score, -np.inf)
+
+
+def _optimize_window(args):
+    train, test, thresholds, objective, min_trades = args
+    best = (-np.inf, None, None)
+    for lookback, z in _cache.z.items():
+        returns, trades = _signal_returns(z, thresholds, train)
+        score = _score(returns, trades, objective, min_trades)
+        k = int(np.argmax(score))
+        if score[k] > best[0]:
+            best = (float(score[k]), lookback, float(thresholds[k]))
+    score, lookback, threshold = best
+    if lookback is None:
+        return None
+
+    # Out-of-sample: book each trade's return on the bar it exits
+    z = _cache.z[lookback][test]
+    entries = np.arange(test.start, test.stop)
+    booked = []
+    for signal, side in SIGNAL_SIDES.items():
+        hit = (z < -threshold) if signal == 1 else (z > threshold)
+        booked.append((_cache.exit_idx[side][entries[hit]], _cache.outcome[side][entries[hit]]))
+    return lookback, threshold, score, booked
+
+
+# -----------------------------
+# 2️⃣ Walk-forward driver
+# -----------------------------
+@dataclass
+class WalkForwardResult:
+    windows: pd.DataFrame
+    equity: pd.Series
+
+
+def walk_forward(bars: pd.DataFrame, lookbacks=range(10, 61, 5), thresholds=np.arange(0.5, 3.01, 0.25),
+                 train_bars: int = 20_000, test_bars: int = 5_000, objective: str = "total",
+                 min_trades: int = 30, processes: int = None, **cache_kwargs) -> WalkForwardResult:
+    """
+    Roll train/test windows over `bars` (prepared candles with Open/High/Low/Close),
+    pick the best (lookback, z_score_threshold) on each train window in parallel, and
+    stitch the out-of-sample returns of each pick into one equity curve.
+    """
+    cache = build_cache(bars, lookbacks, **cache_kwargs)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    n = len(bars)
+    jobs = []
+    for start in range(0, n - train_bars - test_bars + 1, test_bars):
+        train = slice(start, start + train_bars)
+        test = slice(start + train_bars, start + train_bars + test_bars)
+        jobs.append((train, test, thresholds, objective, min_trades))
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(cache,)) as pool:
+        results = list(pool.map(_optimize_window, jobs))
+
+    pnl = np.zeros(n)
+    rows = []
+    for (train, test, *_), res in zip(jobs, results):
+        row = {"train_start": bars.index[train.start], "test_start": bars.index[test.start],
+               "test_end": bars.index[test.stop - 1], "lookback": None, "z_score_threshold": None,
+               "in_sample_score": np.nan, "oos_return": 0.0, "oos_trades": 0}
+        if res is not None:
+            lookback, threshold, score, booked = res
+            for exits, returns in booked:
+                np.add.at(pnl, exits, returns)
+                row["oos_return"] += float(returns.sum())
+                row["oos_trades"] += len(returns)
+            row.update(lookback=lookback, z_score_threshold=threshold, in_sample_score=score)
+        rows.append(row)
+
+    first_test = train_bars
+    equity = pd.Series(np.cumsum(pnl[first_test:]), index=bars.index[first_test:], name="oos_equity")
+    return WalkForwardResult(pd.DataFrame(rows), equity)
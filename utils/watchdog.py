@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+
+from utils.log import get_logger, log_event
+
+log = get_logger("watchdog")
+
+# -----------------------------
+# 0️⃣ Heartbeats
+# -----------------------------
+class Heartbeat:
+    """
+    Handed to a worker; call it with the seconds until the next beat is due.
+
+    Returns False (and `current` turns False) once the watchdog has replaced this
+    worker, so a thread that comes back from a long stall exits instead of trading
+    next to its replacement.
+    """
+    __slots__ = ("watchdog", "name", "generation")
+
+    def __init__(self, watchdog, name: str, generation: int):
+        self.watchdog = watchdog
+        self.name = name
+        self.generation = generation
+
+    @property
+    def current(self) -> bool:
+        return self.watchdog._workers[self.name].generation == self.generation
+
+    def __call__(self, next_within: float) -> bool:
+        worker = self.watchdog._workers[self.name]
+        if worker.generation != self.generation:
+            return False
+        worker.due = time.monotonic() + max(next_within, 0.0)
+        return True
+
+
+class _Worker:
+    __slots__ = ("target", "args", "thread", "generation", "due", "restarts")
+
+    def __init__(self, target, args):
+        self.target = target
+        self.args = args
+        self.thread = None
+        self.generation = 0
+        self.due = None
+        self.restarts = 0
+
+
+# -----------------------------
+# 1️⃣ Watchdog
+# -----------------------------
+class Watchdog:
+    """
+    Starts the per-symbol worker threads and restarts the ones that stop beating.
+
+    Each worker is called as target(*args, heartbeat) and must beat once per cycle.
+    A worker is stalled when `grace` seconds have passed since its beat was due (e.g.
+    a request hung past every timeout) and dead when its thread exited; either way it
+    is reported and a fresh thread is started with the same arguments.
+    """
+
+    def __init__(self, grace: float = 60.0, interval: float = 5.0, startup: float = 120.0):
+        self.grace = grace
+        self.interval = interval
+        self.startup = startup        # time a fresh worker gets for its first beat
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def spawn(self, name: str, target, *args) -> None:
+        with self._lock:
+            worker = self._workers.setdefault(name, _Worker(target, args))
+            self._start(name, worker)
+
+    def _start(self, name: str, worker: _Worker) -> None:
+        worker.generation += 1
+        worker.due = time.monotonic() + self.startup
+        worker.thread = threading.Thread(target=worker.target, name=f"{name}#{worker.generation}",
+                                         args=(*worker.args, Heartbeat(self, name, worker.generation)),
+                                         daemon=True)
+        worker.thread.start()
+
+    def check(self) -> list:
+        """Restart stalled or dead workers; returns their names."""
+        now = time.monotonic()
+        restarted = []
+        with self._lock:
+            for name, worker in self._workers.items():
+                late = now - worker.due - self.grace
+                alive = worker.thread.is_alive()
+                if alive and late <= 0:
+                    continue
+                worker.restarts += 1
+                log_event(log, "worker_stalled" if alive else "worker_died", level=logging.ERROR,
+                          worker=name, overdue_s=round(max(now - worker.due, 0.0), 1), restarts=worker.restarts)
+                self._start(name, worker)
+                restarted.append(name)
+        return restarted
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def join(self) -> None:
+        """Block for as long as the watchdog runs (the workers are daemon threads)."""
+        while not self._stop.wait(1.0):
+            pass
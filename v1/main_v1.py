@@ -6,11 +6,16 @@ from datetime import datetime, timedelta, timezone
 
 np.NaN = np.nan
 import pandas_ta as ta
-from oandapyV20 import API
 from oandapyV20.endpoints import instruments, orders
 import warnings
 from dotenv import load_dotenv
 import traceback
+from utils.api_client import GuardedAPI
+from utils.instruments import load_instrument_specs
+from utils.ring_buffer import BarRingBuffer, candle_fields
+from utils.lookback import Lookback, required_bars
+from utils.candle_decode import fetch_candles
+from utils.bar_close import next_bar_close, await_bar_close
 
 # -----------------------------
 # 0️⃣ Setup
@@ -18,15 +23,16 @@ import traceback
 load_dotenv()
 account_id = os.getenv('OANDA_ACCOUNT_ID')
 access_key = os.getenv('OANDA_ACCESS_KEY')
-api = API(access_token=access_key)
+api = GuardedAPI(access_token=access_key)  # request timeouts + per-endpoint circuit breaker
 warnings.filterwarnings("ignore")
+instrument_specs = {}
 
 
 # -----------------------------
 # 1️⃣ Helper functions
 # -----------------------------
-def get_candles(symbol: str, count: int = 20, granularity: str = 'M1'):
-    params = {"count": count, "granularity": granularity, "price": "MBA"}
+def get_candles(symbol: str, count: int = 20, granularity: str = 'M1', price: str = "MBA"):
+    params = {"count": count, "granularity": granularity, "price": price}
     r = instruments.InstrumentsCandles(instrument=symbol, params=params)
     response = api.request(r)
     return response['candles']
@@ -35,23 +41,17 @@ def get_candles(symbol: str, count: int = 20, granularity: str = 'M1'):
 def candles_to_df(candles):
     records = []
     for c in candles:
-        records.append({
+        record = {
             "time": pd.to_datetime(c["time"]),
             "complete": c["complete"],
             "volume": c["volume"],
-            "mid_o": float(c["mid"]["o"]),
-            "mid_h": float(c["mid"]["h"]),
-            "mid_l": float(c["mid"]["l"]),
-            "mid_c": float(c["mid"]["c"]),
-            "bid_o": float(c["bid"]["o"]),
-            "bid_h": float(c["bid"]["h"]),
-            "bid_l": float(c["bid"]["l"]),
-            "bid_c": float(c["bid"]["c"]),
-            "ask_o": float(c["ask"]["o"]),
-            "ask_h": float(c["ask"]["h"]),
-            "ask_l": float(c["ask"]["l"]),
-            "ask_c": float(c["ask"]["c"]),
-        })
+        }
+        # only the components that were requested ("M", "BA" or "MBA") are in the payload
+        for comp in ("mid", "bid", "ask"):
+            if comp in c:
+                for f in "ohlc":
+                    record[f"{comp}_{f}"] = float(c[comp][f])
+        records.append(record)
     return pd.DataFrame(records)
 
 
@@ -63,10 +63,10 @@ def place_order(units: int, side: str, sl: float, tp: float, symbol: str):
             "type": "MARKET",
             "positionFill": "DEFAULT",
             "stopLossOnFill": {
-                "price": str(round(sl, 5))
+                "price": instrument_specs[symbol].format_price(sl)
             },
             "takeProfitOnFill": {
-                "price": str(round(tp, 5))
+                "price": instrument_specs[symbol].format_price(tp)
             }
         }
     }
@@ -79,30 +79,37 @@ def place_order(units: int, side: str, sl: float, tp: float, symbol: str):
 # 2️⃣ Main trading loop
 # -----------------------------
 def main():
+    global instrument_specs
     symbol = "AUD_USD"
+    instrument_specs = load_instrument_specs(api, account_id)
     backcandles = 15
     units = 1000
 
     # ATR-based SL/TP scaling (matches your backtest)
     ATR_multiplier = 1.2  # How far SL is from entry
     TPSL_ratio = 1.5  # TP distance = SL distance * TPSL_ratio
+    # VWAP/RSI/BB/ATR below read mid High/Low/Close/Volume; the entry printout reads the close
+    # bid/ask → fetched as "BA", mid derived
+    # History for the indicators below: the day for VWAP, which covers RSI(16)/ATR(14) convergence
+    lookbacks = (Lookback('vwap', 0, 'session'), Lookback('rsi', 16, 'wilder', diff=1), Lookback('bbands', 14),
+                 Lookback('atr', 14, 'wilder', diff=1), Lookback('backcandles', backcandles))
+    buffer = BarRingBuffer(capacity=required_bars(lookbacks, granularity='M1'),
+                           fields=candle_fields(('High', 'Low', 'Close', 'Volume'), ('bid_c', 'ask_c')))
 
     while True:
         now = datetime.now(timezone.utc)
-        next_minute = (now + timedelta(minutes=1)).replace(second=0,
-                                                           microsecond=0)
+        next_minute = next_bar_close(now, 'M1')
         time.sleep(max(0, (next_minute - now).total_seconds()))
 
-        candles = get_candles(symbol, count=5000)
-        df = candles_to_df(candles)
-        df = df[df['complete']]
-        if len(df) < backcandles:
+        bar = await_bar_close(buffer, lambda count: fetch_candles(api, symbol, buffer.source_fields, count=count,
+                                                                  price=buffer.price),
+                              next_minute, 'M1', deadline=5.0)
+        if not bar.confirmed:
+            print(f"[{datetime.now(timezone.utc)}] {symbol}: bar {next_minute} not final after {bar.latency:.1f}s")
+        new_bars = bar.new_bars
+        if not new_bars or len(buffer) < backcandles:
             continue
-
-        df['Open'], df['High'], df['Low'], df['Close'], df['Volume'] = df[
-            'mid_o'], df['mid_h'], df['mid_l'], df['mid_c'], df['volume']
-        df = df.sort_values('time')
-        df.set_index('time', inplace=True)
+        df = buffer.frame()
 
         # Indicators
         df['VWAP'] = ta.vwap(df['High'], df['Low'], df['Close'], df['Volume'])